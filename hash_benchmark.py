@@ -0,0 +1,157 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: Compares the hash functions available to both HashMaps on
+# distribution quality (how evenly keys spread over a prime number of
+# buckets) and throughput (keys hashed per second, and puts per second
+# into a HashMap using that function), then compares the probe sequences
+# of the OA HashMap on the same keys.
+
+
+import random
+import string
+import time
+from functools import partial
+
+from include import (hash_function_1, hash_function_2, hash_function_builtin,
+                     hash_function_bytes, seeded_hash_function)
+import hash_map_oa
+import hash_map_sc
+
+
+FUNCTIONS = (
+    ('hash_function_1', hash_function_1),
+    ('hash_function_2', hash_function_2),
+    ('hash_function_builtin', hash_function_builtin),
+    ('hash_function_bytes', hash_function_bytes),
+    ('seeded_hash_function(42)', seeded_hash_function(42)),
+)
+
+PROBINGS = ('linear', 'quadratic', 'triangular', 'double')
+
+# a weak and a strong function, since weak ones are where probing differs most
+PROBING_FUNCTIONS = (
+    ('hash_function_2', hash_function_2),
+    ('hash_function_bytes', hash_function_bytes),
+)
+
+
+def key_sets(count: int) -> dict:
+    """
+    Returns the key sets used by the benchmark, keyed by description.
+    """
+    rng = random.Random(261)
+    return {
+        'sequential "str<i>"': ['str' + str(i) for i in range(count)],
+        'random words': [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+                         for _ in range(count)],
+        'long paths': ['/var/log/service/' + str(i) + '/' + 'x' * 64 for i in range(count)],
+    }
+
+
+def distribution(function: callable, keys: list, capacity: int) -> (int, int, float):
+    """
+    Hashes keys into capacity buckets and returns the number of distinct
+    hash values, the longest bucket, and the chi-squared statistic against
+    a uniform spread divided by its degrees of freedom (about 1.0 is ideal).
+    """
+    counts = [0] * capacity
+    hashes = set()
+    for key in keys:
+        hash = function(key)
+        hashes.add(hash)
+        counts[hash % capacity] += 1
+
+    expected = len(keys) / capacity
+    chi_squared = sum((count - expected) ** 2 for count in counts) / expected
+    return len(hashes), max(counts), chi_squared / (capacity - 1)
+
+
+def throughput(function: callable, keys: list) -> float:
+    """
+    Returns how many keys per second function hashes.
+    """
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def put_throughput(make_map: callable, function: callable, keys: list) -> float:
+    """
+    Returns how many puts per second a new map from make_map(function) takes.
+    """
+    map = make_map(function)
+    start = time.perf_counter()
+    for i in range(len(keys)):
+        map.put(keys[i], i)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def get_throughput(map, keys: list) -> float:
+    """
+    Returns how many gets per second map answers for keys.
+    """
+    start = time.perf_counter()
+    for key in keys:
+        map.get(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def probe_lengths(map: hash_map_oa.HashMap, keys: list) -> (float, int):
+    """
+    Returns the mean and the longest number of buckets a get looks at to
+    find each of keys, which must all be in map.
+    """
+    buckets = map._buckets
+    capacity = buckets.length()
+    total = longest = 0
+    for key in keys:
+        index = map._hash_function(key) % capacity
+        step = map._first_step(key, capacity)
+        probes = 1
+        while buckets.get_at_index(index).key != key:
+            index = (index + step) % capacity
+            step += map._probe_growth
+            probes += 1
+        total += probes
+        longest = max(longest, probes)
+    return total / len(keys), longest
+
+
+def make_sc_map(function: callable) -> hash_map_sc.HashMap:
+    """Returns a growing SC HashMap using function."""
+    return hash_map_sc.HashMap(11, function, max_load=1.0)
+
+
+def make_oa_map(function: callable) -> hash_map_oa.HashMap:
+    """Returns an OA HashMap using function."""
+    return hash_map_oa.HashMap(11, function)
+
+
+if __name__ == "__main__":
+    count = 20000
+    capacity = 10007
+
+    for description, keys in key_sets(count).items():
+        print(f"\n{description} ({count} keys, {capacity} buckets)")
+        print(f"{'function':<26}{'distinct':>10}{'max':>6}{'chi2/df':>10}"
+              f"{'hash/s':>12}{'SC put/s':>12}{'OA put/s':>12}")
+        for name, function in FUNCTIONS:
+            distinct, longest, chi_squared = distribution(function, keys, capacity)
+            print(f"{name:<26}{distinct:>10}{longest:>6}{chi_squared:>10.2f}"
+                  f"{throughput(function, keys):>12.0f}"
+                  f"{put_throughput(make_sc_map, function, keys[:5000]):>12.0f}"
+                  f"{put_throughput(make_oa_map, function, keys[:5000]):>12.0f}")
+
+    for description, keys in key_sets(5000).items():
+        print(f"\n{description} (5000 keys, OA HashMap probe sequences)")
+        print(f"{'function':<22}{'probing':<12}{'put/s':>10}{'get/s':>10}{'mean':>8}{'max':>6}")
+        for name, function in PROBING_FUNCTIONS:
+            for probing in PROBINGS:
+                make_map = partial(hash_map_oa.HashMap, 11, probing=probing)
+                map = make_map(function)
+                map.put_many([(key, i) for i, key in enumerate(keys)])
+                mean, longest = probe_lengths(map, keys)
+                print(f"{name:<22}{probing:<12}"
+                      f"{put_throughput(make_map, function, keys):>10.0f}"
+                      f"{get_throughput(map, keys):>10.0f}{mean:>8.2f}{longest:>6}")
@@ -0,0 +1,272 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: This program implements AsyncHashMap, a wrapper that lets
+# an asyncio program use either HashMap without blocking its event loop
+# for long: bulk operations, resizes and full walks of the table are
+# awaitable and give control back to the loop every yield_every buckets
+# or keys.
+
+
+import asyncio
+
+from include import DynamicArray, as_list, hash_function_1
+import hash_map_oa
+import hash_map_sc
+
+
+class AsyncHashMap:
+    """
+    Wraps a HashMap (SC, OA or FlatHashMap) created in incremental resize
+    mode, i.e. with a rehash_step. A resize then only swaps in the new table;
+    the entries are moved over by later operations and by the coroutines
+    here, which move yield_every old buckets at a time and yield to the
+    event loop in between. The coroutines also build new tables
+    yield_every buckets at a time, and bulk puts grow the table that way
+    before they need to. Single key operations stay plain methods since
+    they only do a bounded amount of work, except that a put may still
+    allocate a bigger table all at once.
+    """
+
+    def __init__(self, map=None, yield_every: int = 1024) -> None:
+        """
+        Initialize new AsyncHashMap wrapping map, by default a growing
+        SC HashMap using hash_function_1.
+        """
+        if map is None:
+            map = hash_map_sc.HashMap(11, hash_function_1, max_load=1.0, rehash_step=4)
+        if map._rehash_step is None:
+            raise ValueError("map must be created with a rehash_step so its resizes can be spread out")
+        if yield_every < 1:
+            raise ValueError("yield_every must be at least 1")
+
+        self._map = map
+        self._yield_every = yield_every
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return str(self._map)
+
+    def get_map(self) -> object:
+        """Return the wrapped hash map."""
+        return self._map
+
+    def get_size(self) -> int:
+        """Return size of map"""
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """Return capacity of map"""
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """Returns the current hash table load factor"""
+        return self._map.table_load()
+
+    def put(self, key: str, value: object) -> None:
+        """Updates the key/value pair in the hash map."""
+        self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """Returns the value associated with the given key."""
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """Returns true if the given key is in the hash map; otherwise, returns false."""
+        return self._map.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """Removes the given key and its associated value from the hash map."""
+        self._map.remove(key)
+
+    def __len__(self) -> int:
+        """Returns the number of key/value pairs in the hash map."""
+        return len(self._map)
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether key is in the hash map."""
+        return key in self._map
+
+    async def finish_resize(self) -> None:
+        """
+        Moves every entry still waiting in the old table of a resize into
+        the new one, yield_every buckets at a time.
+        """
+        map = self._map
+        while map._old_buckets is not None:
+            map._migrate_buckets(self._yield_every)
+            await asyncio.sleep(0)
+
+    async def _new_buckets(self, capacity: int):
+        """
+        Returns a new table of capacity empty buckets for the wrapped map,
+        built yield_every buckets at a time.
+        """
+        map = self._map
+        if not isinstance(map._buckets, DynamicArray):
+            # e.g. FlatBuckets, which are allocated in C all at once
+            return map._new_buckets(capacity)
+
+        data = []
+        step = self._yield_every
+        for start in range(0, capacity, step):
+            data.extend(map._new_buckets(min(step, capacity - start))._data)
+            await asyncio.sleep(0)
+        return DynamicArray(data)
+
+    async def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, returning once
+        every entry has been moved. Other tasks can keep using the map
+        while this waits; they see every entry, whichever table it's in.
+        """
+        map = self._map
+        await self.finish_resize()
+        capacity = map._target_capacity(new_capacity)
+        if capacity is None:
+            return
+
+        buckets = await self._new_buckets(capacity)
+
+        # other tasks may have grown the map while the table was built
+        if map._target_capacity(new_capacity) == capacity:
+            map._start_rehash(capacity, buckets)
+        else:
+            map.resize_table(new_capacity)
+        await self.finish_resize()
+
+    async def _reserve(self, count: int) -> None:
+        """
+        Grows the table, if needed, so count more entries fit without the
+        map having to resize by itself.
+        """
+        new_capacity = self._map._reserved_capacity(count)
+        if new_capacity is not None:
+            await self.resize_table(new_capacity)
+
+    async def put_many(self, pairs) -> None:
+        """
+        Updates every key/value pair in pairs, which may be a DynamicArray
+        or any iterable of (key, value) tuples, yield_every pairs at a time.
+        """
+        pairs = as_list(pairs)
+        step = self._yield_every
+        for start in range(0, len(pairs), step):
+            batch = pairs[start:start + step]
+            await self._reserve(len(batch))
+            self._map.put_many(batch)
+            await self.finish_resize()
+
+    async def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value associated with each key
+        in keys (None for missing keys), in the same order, looking up
+        yield_every keys at a time.
+        """
+        keys = as_list(keys)
+        step = self._yield_every
+        values = []
+        for start in range(0, len(keys), step):
+            values.extend(self._map.get_many(keys[start:start + step])._data)
+            await asyncio.sleep(0)
+        return DynamicArray(values)
+
+    async def remove_many(self, keys) -> int:
+        """
+        Removes every key in keys, yield_every keys at a time, and returns
+        how many of them were in the hash map.
+        """
+        keys = as_list(keys)
+        step = self._yield_every
+        removed = 0
+        for start in range(0, len(keys), step):
+            removed += self._map.remove_many(keys[start:start + step])
+            await self.finish_resize()
+        return removed
+
+    async def items(self):
+        """
+        Asynchronously yields every (key, value) pair in the hash map,
+        yielding to the event loop every yield_every buckets. Like the
+        wrapped map's items(), raises RuntimeError if entries are added,
+        removed or moved meanwhile.
+        """
+        await self.finish_resize()
+        map = self._map
+        modifications = map._modifications
+        buckets = map._buckets
+        step = self._yield_every
+        for start in range(0, buckets.length(), step):
+            for item in map._live_items(buckets, start, start + step):
+                yield item
+                if map._modifications != modifications:
+                    raise RuntimeError("HashMap changed during iteration")
+            await asyncio.sleep(0)
+            if map._modifications != modifications:
+                raise RuntimeError("HashMap changed during iteration")
+
+    async def keys(self):
+        """Asynchronously yields every key in the hash map."""
+        async for key, _ in self.items():
+            yield key
+
+    async def values(self):
+        """Asynchronously yields every value in the hash map."""
+        async for _, value in self.items():
+            yield value
+
+    async def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        return DynamicArray([item async for item in self.items()])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    async def main() -> None:
+        print("\nasync put_many example")
+        print("----------------------")
+        m = AsyncHashMap(yield_every=256)
+        await m.put_many([('str' + str(i), i * 100) for i in range(5000)])
+        print(m.get_size(), m.get_capacity(), m.get('str1234'))
+        await m.resize_table(20000)
+        print(m.get_size(), m.get_capacity(), m.get('str1234'))
+        pairs = await m.get_keys_and_values()
+        print(pairs.length(), await m.remove_many(['str' + str(i) for i in range(0, 5000, 2)]))
+
+        print("\nasync compared with dict")
+        print("------------------------")
+        for map in (hash_map_sc.HashMap(11, hash_function_1, max_load=1.0, rehash_step=4),
+                    hash_map_oa.HashMap(11, hash_function_1, rehash_step=4),
+                    hash_map_oa.FlatHashMap(11, hash_function_1, rehash_step=4)):
+            m = AsyncHashMap(map, yield_every=64)
+            expected = {}
+
+            async def churn(start: int) -> None:
+                # tasks own their keys and interleave at every await
+                for i in range(0, 3000, 300):
+                    batch = [('key' + str(start + j * 7919 % 1000), j) for j in range(i, i + 300)]
+                    await m.put_many(batch[:200])
+                    await m.remove_many([key for key, _ in batch[200:]])
+
+            for start in range(0, 3000, 1000):
+                for i in range(0, 3000, 300):
+                    batch = [('key' + str(start + j * 7919 % 1000), j) for j in range(i, i + 300)]
+                    expected.update(batch[:200])
+                    for key, _ in batch[200:]:
+                        expected.pop(key, None)
+
+            await asyncio.gather(*(churn(start) for start in range(0, 3000, 1000)))
+            await m.resize_table(4 * m.get_size())
+            pairs = {key: value async for key, value in m.items()}
+            result = pairs == expected and len(m) == len(expected)
+            values = await m.get_many(list(expected))
+            result &= values.length() == len(expected)
+            result &= all(values[i] == value for i, value in enumerate(expected.values()))
+            result &= not m.contains_key('key3000')
+            print(type(map).__module__, type(map).__name__, result, m.get_size(), m.get_capacity())
+
+    asyncio.run(main())
@@ -0,0 +1,511 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: This program implements Cache, a bounded in-process cache
+# built on the separate chaining HashMap. The cache holds at most a given
+# number of entries and/or bytes and evicts entries according to a
+# pluggable policy: LRUPolicy (least recently used), LFUPolicy (least
+# frequently used) or TTLPolicy (soonest to expire). Any entry can also be
+# given a time to live, after which it is dropped whatever the policy.
+
+
+import heapq
+import sys
+import time
+
+from include import hash_function_1
+from hash_map_sc import HashMap
+
+
+class CacheEntry:
+    """
+    Entry of a Cache, stored as the value in its HashMap. The eviction
+    policies link entries together directly through prev and next, so
+    keeping an entry in order never allocates another node.
+    """
+
+    # no per-entry __dict__, since a full cache holds one entry per key
+    __slots__ = ('key', 'value', 'hash', 'size', 'expires', 'prev', 'next', 'frequency', 'record')
+
+    def __init__(self, key: str, value: object, hash: int, size: int, expires: float) -> None:
+        """Initialize an entry given its key, value, key hash, size in bytes and expiry time."""
+        self.key = key
+        self.value = value
+        self.hash = hash
+        self.size = size
+        self.expires = expires
+
+        # maintained by the eviction policy
+        self.prev = None
+        self.next = None
+        self.frequency = None
+        self.record = None
+
+
+def _link_after(node: object, entry: object) -> None:
+    """Inserts entry into a circular doubly linked list right after node."""
+    entry.prev = node
+    entry.next = node.next
+    node.next.prev = entry
+    node.next = entry
+
+
+def _unlink(entry: object) -> None:
+    """Removes entry from the circular doubly linked list it's in."""
+    entry.prev.next = entry.next
+    entry.next.prev = entry.prev
+    entry.prev = entry.next = None
+
+
+def _new_sentinel() -> CacheEntry:
+    """Returns the sentinel of a new, empty circular doubly linked list."""
+    sentinel = CacheEntry(None, None, None, 0, None)
+    sentinel.prev = sentinel.next = sentinel
+    return sentinel
+
+
+class LRUPolicy:
+    """
+    Evicts the least recently used entry. Entries are kept in a doubly
+    linked list from least to most recently used; every operation is O(1).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty policy."""
+        self._sentinel = _new_sentinel()
+
+    def insert(self, entry: CacheEntry) -> None:
+        """Starts tracking entry as the most recently used."""
+        _link_after(self._sentinel.prev, entry)
+
+    def access(self, entry: CacheEntry) -> None:
+        """Marks entry as the most recently used."""
+        _unlink(entry)
+        _link_after(self._sentinel.prev, entry)
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Stops tracking entry."""
+        _unlink(entry)
+
+    def victim(self) -> CacheEntry:
+        """Returns the entry to evict next."""
+        return self._sentinel.next
+
+    def clear(self) -> None:
+        """Stops tracking every entry."""
+        self._sentinel = _new_sentinel()
+
+
+class _FrequencyNode:
+    """
+    Node of LFUPolicy's list of frequencies, holding the list of entries
+    used exactly frequency times, from least to most recently used.
+    """
+
+    def __init__(self, frequency: int) -> None:
+        """Initialize a node for frequency with no entries."""
+        self.frequency = frequency
+        self.entries = _new_sentinel()
+        self.prev = None
+        self.next = None
+
+
+class LFUPolicy:
+    """
+    Evicts the least frequently used entry, the least recently used one
+    among ties. Entries are grouped by use count in a list of frequency
+    nodes kept in increasing order, so every operation is O(1).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty policy."""
+        self._sentinel = _FrequencyNode(0)
+        self._sentinel.prev = self._sentinel.next = self._sentinel
+
+    @staticmethod
+    def _add(entry: CacheEntry, node: _FrequencyNode) -> None:
+        """
+        Adds entry as the most recently used entry of the node after node,
+        first creating a node there if it isn't for the next frequency.
+        """
+        frequency = node.frequency + 1
+        next = node.next
+        if next.frequency != frequency:
+            next = _FrequencyNode(frequency)
+            _link_after(node, next)
+        _link_after(next.entries.prev, entry)
+        entry.frequency = next
+
+    def insert(self, entry: CacheEntry) -> None:
+        """Starts tracking entry as used once."""
+        self._add(entry, self._sentinel)
+
+    def access(self, entry: CacheEntry) -> None:
+        """Counts one more use of entry."""
+        node = entry.frequency
+        alone = node.entries.next is entry and node.entries.prev is entry
+        if alone and node.next.frequency != node.frequency + 1:
+            # the entry can keep its node, which just moves up a frequency
+            node.frequency += 1
+            return
+
+        _unlink(entry)
+        self._add(entry, node)
+        if alone:
+            _unlink(node)
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Stops tracking entry."""
+        node = entry.frequency
+        _unlink(entry)
+        entry.frequency = None
+        if node.entries.next is node.entries:
+            _unlink(node)
+
+    def victim(self) -> CacheEntry:
+        """Returns the entry to evict next."""
+        return self._sentinel.next.entries.next
+
+    def clear(self) -> None:
+        """Stops tracking every entry."""
+        self._sentinel.prev = self._sentinel.next = self._sentinel
+
+
+class TTLPolicy:
+    """
+    Evicts the entry that expires soonest; entries without a time to live
+    go last, oldest first. Uses a min-heap whose stale records (for
+    entries since removed) are skipped when popped, and dropped in a
+    rebuild once they make up most of the heap. O(log n) per operation.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty policy."""
+        self._heap = []
+        self._sequence = 0
+        self._count = 0
+
+    def insert(self, entry: CacheEntry) -> None:
+        """Starts tracking entry."""
+        # the sequence number breaks ties, so entries are never compared
+        self._sequence += 1
+        self._count += 1
+        expires = float('inf') if entry.expires is None else entry.expires
+        entry.record = (expires, self._sequence, entry)
+        heapq.heappush(self._heap, entry.record)
+
+    def access(self, entry: CacheEntry) -> None:
+        """Picks up a change of entry's expiry time, if any."""
+        expires = float('inf') if entry.expires is None else entry.expires
+        if entry.record[0] != expires:
+            self.remove(entry)
+            self.insert(entry)
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Stops tracking entry."""
+        entry.record = None
+        self._count -= 1
+        if len(self._heap) > 2 * self._count + 16:
+            self._heap = [record for record in self._heap if record[2].record is record]
+            heapq.heapify(self._heap)
+
+    def victim(self) -> CacheEntry:
+        """Returns the entry to evict next."""
+        heap = self._heap
+        while heap[0][2].record is not heap[0]:
+            heapq.heappop(heap)
+        return heap[0][2]
+
+    def clear(self) -> None:
+        """Stops tracking every entry."""
+        self._heap = []
+        self._count = 0
+
+
+def _sizeof(key: str, value: object) -> int:
+    """
+    Returns the default size of a cache entry in bytes: the shallow sizes
+    of its key and value.
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class Cache:
+    def __init__(self,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 policy: object = None,
+                 default_ttl: float = None,
+                 function: callable = hash_function_1,
+                 sizeof: callable = _sizeof,
+                 clock: callable = time.monotonic) -> None:
+        """
+        Initialize new Cache holding at most max_entries entries and at most
+        max_bytes bytes, as measured by sizeof(key, value); either limit may
+        be left out. Once a put goes over a limit, policy (by default an
+        LRUPolicy) picks the entries to evict. Entries put without a ttl
+        expire default_ttl seconds after being put, as told by clock, or
+        never if it's None.
+        """
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+
+        self._map = HashMap(max_entries or 11, function, max_load=1.0)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._policy = LRUPolicy() if policy is None else policy
+        self._default_ttl = default_ttl
+        self._sizeof = sizeof
+        self._clock = clock
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get_size(self) -> int:
+        """Return the number of entries in the cache."""
+        return self._map.get_size()
+
+    def get_bytes(self) -> int:
+        """Return the total size of the entries in the cache in bytes."""
+        return self._bytes
+
+    def get_hits(self) -> int:
+        """Return how many gets found their key."""
+        return self._hits
+
+    def get_misses(self) -> int:
+        """Return how many gets didn't find their key, including expired keys."""
+        return self._misses
+
+    def get_evictions(self) -> int:
+        """Return how many entries were evicted to stay within the limits."""
+        return self._evictions
+
+    def get_expirations(self) -> int:
+        """Return how many entries were dropped because they expired."""
+        return self._expirations
+
+    def _discard(self, entry: CacheEntry) -> None:
+        """
+        Removes entry from the hash map and the policy.
+        """
+        self._map._remove(entry.key, entry.hash)
+        self._policy.remove(entry)
+        self._bytes -= entry.size
+
+    def _live_entry(self, key: str, hash: int) -> CacheEntry:
+        """
+        Returns the entry for key, given the key's hash, or None if it's
+        missing. An expired entry is dropped and None returned.
+        """
+        entry = self._map._get(key, hash)
+        if entry is not None and entry.expires is not None and self._clock() >= entry.expires:
+            self._discard(entry)
+            self._expirations += 1
+            return None
+        return entry
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, marking it as
+        used, or None if the key isn't in the cache or has expired.
+        """
+        entry = self._live_entry(key, self._map._hash_function(key))
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._policy.access(entry)
+        return entry.value
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Updates the key/value pair in the cache, marking it as used. The
+        entry expires after ttl seconds (default_ttl if ttl is None).
+        Entries are evicted as needed to stay within the limits; a new key
+        is never evicted by its own put. A value too big to fit in
+        max_bytes on its own isn't stored at all.
+        """
+        map = self._map
+        hash = map._hash_function(key)
+        size = self._sizeof(key, value)
+        if ttl is None:
+            ttl = self._default_ttl
+        expires = None if ttl is None else self._clock() + ttl
+
+        entry = map._get(key, hash)
+        if self._max_bytes is not None and size > self._max_bytes:
+            if entry is not None:
+                self._discard(entry)
+            return
+
+        if entry is None:
+            self._evict(1, size)
+            entry = CacheEntry(key, value, hash, size, expires)
+            map._put(key, hash, entry)
+            self._policy.insert(entry)
+            self._bytes += size
+            return
+
+        entry.value = value
+        entry.expires = expires
+        self._bytes += size - entry.size
+        entry.size = size
+        self._policy.access(entry)
+        self._evict(0, 0)
+
+    def _evict(self, count: int, size: int) -> None:
+        """
+        Evicts entries picked by the policy until count more entries of
+        size more bytes fit within the limits.
+        """
+        max_entries = self._max_entries
+        max_bytes = self._max_bytes
+        map = self._map
+        while ((max_entries is not None and map.get_size() + count > max_entries)
+               or (max_bytes is not None and self._bytes + size > max_bytes)):
+            self._discard(self._policy.victim())
+            self._evictions += 1
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the given key is in the cache and hasn't expired;
+        otherwise, returns false. Doesn't mark the key as used.
+        """
+        return self._live_entry(key, self._map._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the cache.
+        """
+        self._remove(key)
+
+    def _remove(self, key: str) -> bool:
+        """
+        Removes the given key and its associated value from the cache.
+        Returns whether the key was in the cache and hadn't expired.
+        """
+        entry = self._live_entry(key, self._map._hash_function(key))
+        if entry is None:
+            return False
+        self._discard(entry)
+        return True
+
+    def purge_expired(self) -> int:
+        """
+        Drops every expired entry and returns how many there were.
+        """
+        now = self._clock()
+        expired = [entry for entry in self._map.values()
+                   if entry.expires is not None and now >= entry.expires]
+        for entry in expired:
+            self._discard(entry)
+        self._expirations += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the cache. The counters are kept.
+        """
+        self._map.clear()
+        self._policy.clear()
+        self._bytes = 0
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Returns the number of entries in the cache, expired or not."""
+        return self.get_size()
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether key is in the cache and hasn't expired."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the value associated with key; raises KeyError if it's missing or expired."""
+        entry = self._live_entry(key, self._map._hash_function(key))
+        if entry is None:
+            self._misses += 1
+            raise KeyError(key)
+
+        self._hits += 1
+        self._policy.access(entry)
+        return entry.value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """Updates the key/value pair in the cache."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Removes key from the cache; raises KeyError if it's missing or expired."""
+        if not self._remove(key):
+            raise KeyError(key)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nLRU example")
+    print("-----------")
+    c = Cache(max_entries=3)
+    for key in ('a', 'b', 'c'):
+        c.put(key, key.upper())
+    c.get('a')
+    c.put('d', 'D')
+    print(c.get('a'), c.get('b'), c.get('c'), c.get('d'))
+    print(c.get_hits(), c.get_misses(), c.get_evictions())
+
+    print("\nLFU example")
+    print("-----------")
+    c = Cache(max_entries=3, policy=LFUPolicy())
+    for key in ('a', 'b', 'c'):
+        c.put(key, key.upper())
+    for key in ('a', 'a', 'b', 'c', 'c'):
+        c.get(key)
+    c.put('d', 'D')
+    print(c.get('a'), c.get('b'), c.get('c'), c.get('d'))
+    print(c.get_hits(), c.get_misses(), c.get_evictions())
+
+    print("\nTTL example")
+    print("-----------")
+    now = [0.0]
+    c = Cache(max_entries=3, policy=TTLPolicy(), default_ttl=10, clock=lambda: now[0])
+    c.put('a', 'A', ttl=5)
+    c.put('b', 'B')
+    c.put('c', 'C', ttl=30)
+    c.put('d', 'D')
+    now[0] = 12
+    print(c.get('a'), c.get('b'), c.get('c'), c.get('d'))
+    print(c.get_hits(), c.get_misses(), c.get_evictions(), c.get_expirations())
+
+    print("\nLRU compared with an ordered dict")
+    print("---------------------------------")
+    c = Cache(max_entries=30)
+    expected = {}
+    result = True
+    for i in range(3000):
+        key = str(i * 7919 % 997 % 80)
+        if i % 5 == 4:
+            c.remove(key)
+            expected.pop(key, None)
+        elif i % 5 == 3:
+            value = c.get(key)
+            result &= value == expected.get(key)
+            if key in expected:
+                expected[key] = expected.pop(key)
+        else:
+            c.put(key, i)
+            expected.pop(key, None)
+            expected[key] = i
+            # the least recently used keys go first
+            while len(expected) > 30:
+                del expected[next(iter(expected))]
+    result &= c.get_size() == len(expected)
+    result &= all((str(i) in c) == (str(i) in expected) for i in range(80))
+    print(result, c.get_size(), c.get_hits(), c.get_misses(), c.get_evictions())
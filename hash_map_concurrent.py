@@ -0,0 +1,423 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: This program implements ConcurrentHashMap, a separate
+# chaining hash map that can be shared between threads. Writers lock only
+# the stripe of buckets they change, readers don't lock at all, and a
+# resize locks every stripe while it builds a new table and swaps it in.
+
+
+import threading
+
+from include import DynamicArray, LinkedList, hash_function_1, next_prime
+
+
+# Returned by _get for missing keys, since None is a valid value
+_MISSING = object()
+
+
+class ConcurrentHashMap:
+    """
+    Thread-safe hash map using separate chaining with lock striping.
+
+    Bucket i of the table is guarded by lock i % stripes, so threads
+    writing to different stripes never wait on each other. Readers take no
+    lock: a new node is linked in by a single assignment of the chain's
+    head and a removed node by a single assignment of its predecessor's
+    next, so a reader walking a chain always sees either the old or the new
+    chain. A resize holds every lock while it copies the nodes into a new
+    table and then swaps the table in with one assignment; readers still
+    walking the old table finish on its unchanged nodes, and writers that
+    were waiting for a lock retry on the new table.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 max_load: float = 1.0,
+                 stripes: int = 16) -> None:
+        """
+        Initialize new ConcurrentHashMap whose buckets are guarded by
+        stripes locks. The table doubles once its load factor goes above
+        max_load.
+        """
+        if max_load <= 0:
+            raise ValueError("max_load must be positive")
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+
+        self._hash_function = function
+        self._max_load = max_load
+        self._stripes = stripes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+        # number of entries in each stripe, changed only under its lock
+        self._sizes = [0] * stripes
+
+        # readers take the table's capacity from the table itself, so a
+        # reference to the table is all they need to stay consistent
+        self._buckets = self._new_buckets(next_prime(capacity))
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        buckets = self._buckets
+        out = ''
+        for i in range(buckets.length()):
+            out += str(i) + ': ' + str(buckets[i]) + '\n'
+        return out
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns a table of capacity empty buckets.
+        """
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(LinkedList())
+        return buckets
+
+    def get_size(self) -> int:
+        """
+        Return size of map. While other threads are writing, the result
+        may be off by the writes still in progress.
+        """
+        return sum(self._sizes)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._buckets.length()
+
+    def _lock_bucket(self, hash: int) -> (int, LinkedList):
+        """
+        Locks the stripe guarding the bucket for hash in the current table
+        and returns the stripe and the bucket. If the table is resized while
+        waiting for the lock, tries again on the new table. The caller must
+        release self._locks[stripe].
+        """
+        while True:
+            buckets = self._buckets
+            index = hash % buckets.length()
+            stripe = index % self._stripes
+            lock = self._locks[stripe]
+            lock.acquire()
+            if buckets is self._buckets:
+                return stripe, buckets.get_at_index(index)
+            lock.release()
+
+    def _lock_all(self) -> None:
+        """
+        Locks every stripe, always in the same order so that two threads
+        locking all of them can't deadlock.
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Releases every stripe.
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def _grow_if_needed(self, capacity: int) -> None:
+        """
+        Doubles the table if its load factor is above max_load and no
+        other thread has resized it since it had the given capacity.
+        """
+        if self.get_size() <= self._max_load * capacity:
+            return
+
+        self._lock_all()
+        try:
+            if self._buckets.length() == capacity:
+                self._resize(capacity * 2)
+        finally:
+            self._unlock_all()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new value.
+        If the given key is not in the hash map, a key/value pair is added.
+        """
+        hash = self._hash_function(key)
+        stripe, list = self._lock_bucket(hash)
+        try:
+            node = list.contains(key, hash)
+            if node is not None:
+                node.value = value
+                return
+            list.insert(key, value, hash)
+            self._sizes[stripe] += 1
+            capacity = self._buckets.length()
+        finally:
+            self._locks[stripe].release()
+
+        self._grow_if_needed(capacity)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key. If the key isn't
+        in the hash map, adds it with default as its value and returns
+        default; the check and the insert happen atomically.
+        """
+        hash = self._hash_function(key)
+        stripe, list = self._lock_bucket(hash)
+        try:
+            node = list.contains(key, hash)
+            if node is not None:
+                return node.value
+            list.insert(key, default, hash)
+            self._sizes[stripe] += 1
+            capacity = self._buckets.length()
+        finally:
+            self._locks[stripe].release()
+
+        self._grow_if_needed(capacity)
+        return default
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, without locking.
+        """
+        return self._get(key, None)
+
+    def _get(self, key: str, default: object) -> object:
+        """
+        Returns the value associated with the given key, or default if the
+        key isn't in the hash map, without locking.
+        """
+        hash = self._hash_function(key)
+        buckets = self._buckets
+        node = buckets.get_at_index(hash % buckets.length()).contains(key, hash)
+        if node is None:
+            return default
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the given key is in the hash map; otherwise, returns
+        false. Doesn't lock.
+        """
+        return self._get(key, _MISSING) is not _MISSING
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._remove(key)
+
+    def _remove(self, key: str) -> bool:
+        """
+        Removes the given key and its associated value from the hash map.
+        Returns whether the key was in the hash map.
+        """
+        hash = self._hash_function(key)
+        stripe, list = self._lock_bucket(hash)
+        try:
+            if not list.remove(key, hash):
+                return False
+            self._sizes[stripe] -= 1
+            return True
+        finally:
+            self._locks[stripe].release()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        buckets = self._buckets
+        empty = 0
+        for i in range(buckets.length()):
+            if buckets.get_at_index(i).length() == 0:
+                empty += 1
+        return empty
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor
+        """
+        return self.get_size() / self.get_capacity()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying table capacity.
+        """
+        self._lock_all()
+        try:
+            self._buckets = self._new_buckets(self._buckets.length())
+            self._sizes = [0] * self._stripes
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        """
+        # if new capacity is less than 1, do nothing
+        if new_capacity < 1:
+            return
+
+        self._lock_all()
+        try:
+            self._resize(new_capacity)
+        finally:
+            self._unlock_all()
+
+    def _resize(self, new_capacity: int) -> None:
+        """
+        Rehashes every entry into a new table of at least new_capacity
+        buckets (rounded up to a prime) and swaps it in. Every stripe must
+        be locked by the caller.
+        """
+        new_capacity = next_prime(new_capacity)
+        buckets = self._new_buckets(new_capacity)
+        sizes = [0] * self._stripes
+
+        # copy the nodes rather than relinking them, so readers still
+        # walking the old table never follow a link into the new one
+        old_buckets = self._buckets
+        for i in range(old_buckets.length()):
+            for node in old_buckets.get_at_index(i):
+                index = node.hash % new_capacity
+                buckets.get_at_index(index).insert(node.key, node.value, node.hash)
+                sizes[index % self._stripes] += 1
+
+        self._sizes = sizes
+        self._buckets = buckets
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map. Entries changed by other threads during the
+        call may or may not be included.
+        """
+        return DynamicArray([(node.key, node.value) for node in self._nodes()])
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Returns the number of key/value pairs in the hash map."""
+        return self.get_size()
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether key is in the hash map."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the value associated with key; raises KeyError if it's missing."""
+        value = self._get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """Updates the key/value pair in the hash map."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Removes key from the hash map; raises KeyError if it's missing."""
+        if not self._remove(key):
+            raise KeyError(key)
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return self.keys()
+
+    def _nodes(self):
+        """
+        Yields the nodes of the table as it was when iteration started.
+        Unlike the other HashMaps, changes made meanwhile (by this or any
+        other thread) don't raise: entries added or removed during
+        iteration may or may not be seen, but no entry is seen twice.
+        """
+        buckets = self._buckets
+        for i in range(buckets.length()):
+            yield from buckets.get_at_index(i)
+
+    def keys(self):
+        """Returns an iterator over the keys of the hash map."""
+        return (node.key for node in self._nodes())
+
+    def values(self):
+        """Returns an iterator over the values of the hash map."""
+        return (node.value for node in self._nodes())
+
+    def items(self):
+        """Returns an iterator over the (key, value) pairs of the hash map."""
+        return ((node.key, node.value) for node in self._nodes())
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nconcurrent put example")
+    print("----------------------")
+    m = ConcurrentHashMap(11, hash_function_1, stripes=4)
+
+    def put_range(start: int) -> None:
+        for i in range(start, start + 500):
+            m.put('str' + str(i), i * 100)
+
+    threads = [threading.Thread(target=put_range, args=(start,)) for start in range(0, 2000, 500)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), m.get_capacity(), m.get('str1234'), m.contains_key('str2000'))
+
+    print("\nconcurrent put/remove compared with dict")
+    print("----------------------------------------")
+    m = ConcurrentHashMap(11, hash_function_1, stripes=4)
+
+    def churn(start: int) -> None:
+        # each thread owns its own keys, so the end result is known
+        for i in range(3000):
+            key = 'key' + str(start + i * 7919 % 1000)
+            if i % 3 == 2:
+                m.remove(key)
+            else:
+                m.put(key, i)
+            if i % 1000 == 999:
+                m.resize_table(m.get_capacity() + 100)
+
+    expected = {}
+    for start in range(0, 4000, 1000):
+        for i in range(3000):
+            key = 'key' + str(start + i * 7919 % 1000)
+            if i % 3 == 2:
+                expected.pop(key, None)
+            else:
+                expected[key] = i
+
+    threads = [threading.Thread(target=churn, args=(start,)) for start in range(0, 4000, 1000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = dict(m.items()) == expected and len(m) == len(expected)
+    result &= all(m.get(key) == value for key, value in expected.items())
+    result &= not m.contains_key('key4000')
+    print(result, m.get_size(), m.get_capacity())
+
+    # threads racing on the same keys: setdefault keeps the first value only
+    m = ConcurrentHashMap(11, hash_function_1, stripes=4)
+    winners = [[] for _ in range(4)]
+
+    def claim(thread_id: int) -> None:
+        for i in range(1000):
+            if m.setdefault('key' + str(i), thread_id) == thread_id:
+                winners[thread_id].append(i)
+
+    threads = [threading.Thread(target=claim, args=(thread_id,)) for thread_id in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = sorted(i for claimed in winners for i in claimed) == list(range(1000))
+    result &= all(m.get('key' + str(i)) == thread_id for thread_id in range(4) for i in winners[thread_id])
+    print(result, m.get_size())
@@ -0,0 +1,562 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: This program implements CuckooHashMap, a hash map using
+# cuckoo hashing: every key can only be in one of two buckets, one per
+# hash function, so a get never looks at more than two buckets (plus a
+# small stash that is almost always empty). Inserts pay for this by
+# moving other keys around to make room.
+
+
+import math
+
+from include import (DynamicArray, HashEntry, as_list, hash_function_1, hash_function_2,
+                     next_prime, seeded_hash_function)
+
+
+# Returned by _get for missing keys, since None is a valid value
+_MISSING = object()
+
+# rebuilds a map with its own seeded functions tries before giving up
+_MAX_RESEEDS = 8
+
+
+class CuckooEntry(HashEntry):
+    """
+    HashEntry that also caches the key's hash under the second function.
+    """
+
+    __slots__ = ('hash_2',)
+
+    def __init__(self, key: str, value: object, hash: int, hash_2: int) -> None:
+        """Initialize an entry caching both hashes of the key."""
+        super().__init__(key, value, hash)
+        self.hash_2 = hash_2
+
+
+class CuckooHashMap:
+    """
+    Hash map using cuckoo hashing with two tables of equal prime capacity.
+    A key lives either in the first table at function(key) % capacity or in
+    the second at function_2(key) % capacity. An insert that finds both of
+    its buckets taken evicts the key in the first one, which moves to its
+    bucket in the other table, possibly evicting another key, and so on.
+    If that goes on for max_kicks moves, the key left over goes to the
+    stash; once more than stash_size keys are stashed, the tables are
+    rebuilt at double the capacity, which breaks up the cycles.
+
+    By default both functions are seeded_hash_function instances owned by
+    the hash map. If a rebuild still leaves more than stash_size keys
+    stashed, it picks new seeds and rebuilds again, so the stash never
+    holds more than stash_size keys and a get looks at no more than
+    2 + stash_size entries. Hash functions given by the caller can't be
+    reseeded; a rebuild that can't fit their keys raises RuntimeError,
+    with every key still in the hash map. The sample hash_function_1 and
+    hash_function_2 give "str<i>" style keys too few distinct values to be
+    used here.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = None,
+                 function_2: callable = None,
+                 max_load: float = 0.45,
+                 stash_size: int = 4,
+                 max_kicks: int = 32) -> None:
+        """
+        Initialize new CuckooHashMap with about capacity buckets split
+        between its two tables. The tables double once the load factor
+        would go above max_load, which must be below 0.5 for inserts to
+        keep finding room quickly. function and function_2 must be given
+        together; leave both out to use reseedable seeded functions.
+        """
+        if not 0 < max_load < 0.5:
+            raise ValueError("max_load must be between 0 and 0.5")
+        if stash_size < 0:
+            raise ValueError("stash_size can't be negative")
+        if max_kicks < 1:
+            raise ValueError("max_kicks must be at least 1")
+        if (function is None) != (function_2 is None):
+            raise ValueError("function and function_2 must be given together")
+
+        # seed pair of the map's own hash functions, or None for the caller's
+        self._seed = None
+        if function is None:
+            self._seed = 1
+            function, function_2 = seeded_hash_function(1), seeded_hash_function(2)
+        self._hash_function = function
+        self._hash_function_2 = function_2
+        self._max_load = max_load
+        self._stash_size = stash_size
+        self._max_kicks = max_kicks
+
+        # capacity of each table
+        self._capacity = next_prime((capacity + 1) // 2)
+        self._table_1 = self._new_buckets(self._capacity)
+        self._table_2 = self._new_buckets(self._capacity)
+        self._stash = []
+        self._size = 0
+
+        # bumped by every change that adds, removes or moves entries, so
+        # iterators can tell the map changed under them
+        self._modifications = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for name, table in (('T1', self._table_1), ('T2', self._table_2)):
+            for i in range(table.length()):
+                out += name + ' ' + str(i) + ': ' + str(table[i]) + '\n'
+        out += 'stash: ' + ', '.join(str(entry) for entry in self._stash) + '\n'
+        return out
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns a new table of capacity empty buckets.
+        """
+        return DynamicArray([None] * capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the number of buckets in both tables
+        """
+        return 2 * self._capacity
+
+    def get_stash_size(self) -> int:
+        """
+        Return number of entries in the stash
+        """
+        return len(self._stash)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor
+        """
+        return self._size / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self.get_capacity() - (self._size - len(self._stash))
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> (DynamicArray, int, CuckooEntry, int):
+        """
+        Returns the table (or stash list) holding key, the key's index in
+        it, its entry and its hash under the second function, given its
+        hash under the first one. Returns (None, -1, None, hash_2) if the
+        key isn't in the hash map. hash_2 is None when the key was found
+        in the first table, which doesn't need it.
+        """
+        capacity = self._capacity
+        index = hash % capacity
+        entry = self._table_1.get_at_index(index)
+        # compare cached hashes first; keys only when they match
+        if entry is not None and entry.hash == hash and entry.key == key:
+            return self._table_1, index, entry, None
+
+        # the second hash is only needed once the first bucket misses
+        hash_2 = self._hash_function_2(key)
+        index = hash_2 % capacity
+        entry = self._table_2.get_at_index(index)
+        if entry is not None and entry.hash_2 == hash_2 and entry.key == key:
+            return self._table_2, index, entry, hash_2
+
+        stash = self._stash
+        for index in range(len(stash)):
+            entry = stash[index]
+            if entry.hash == hash and entry.key == key:
+                return stash, index, entry, hash_2
+
+        return None, -1, None, hash_2
+
+    def _place(self, entry: CuckooEntry) -> CuckooEntry:
+        """
+        Puts entry, whose key isn't in the hash map, into one of its two
+        buckets, evicting keys into their other bucket as needed. Returns
+        None once every key has a bucket, or the key still without one
+        after max_kicks evictions.
+        """
+        table_1, table_2 = self._table_1, self._table_2
+        capacity = self._capacity
+
+        # take a free bucket without evicting anyone if there is one
+        index_2 = entry.hash_2 % capacity
+        if table_2.get_at_index(index_2) is None:
+            index_1 = entry.hash % capacity
+            if table_1.get_at_index(index_1) is None:
+                table_1.set_at_index(index_1, entry)
+            else:
+                table_2.set_at_index(index_2, entry)
+            return None
+
+        for _ in range(self._max_kicks):
+            index = entry.hash % capacity
+            evicted = table_1.get_at_index(index)
+            table_1.set_at_index(index, entry)
+            if evicted is None:
+                return None
+
+            index = evicted.hash_2 % capacity
+            entry = table_2.get_at_index(index)
+            table_2.set_at_index(index, evicted)
+            if entry is None:
+                return None
+
+        return entry
+
+    def _reseed(self, entries: list) -> None:
+        """
+        Replaces the hash map's seeded functions with the next pair of
+        seeds and recomputes the cached hashes of entries.
+        """
+        self._seed += 2
+        function = self._hash_function = seeded_hash_function(self._seed)
+        function_2 = self._hash_function_2 = seeded_hash_function(self._seed + 1)
+        for entry in entries:
+            entry.hash = function(entry.key)
+            entry.hash_2 = function_2(entry.key)
+
+    def _rebuild(self, capacity: int) -> None:
+        """
+        Puts every entry, including the stashed ones, into new tables of
+        the given prime capacity. Entries left without a bucket are stashed;
+        if that's more than stash_size of them, the functions are reseeded
+        and the entries placed again. Raises RuntimeError if that isn't
+        possible (caller's functions) or keeps failing; every entry is then
+        still in the hash map, placed under the current functions, with the
+        stash over its limit.
+        """
+        entries = [entry for table in (self._table_1, self._table_2)
+                   for entry in table._data if entry is not None]
+        entries.extend(self._stash)
+
+        self._capacity = capacity
+        for attempt in range(_MAX_RESEEDS):
+            # only reseed when another placement follows, so the tables
+            # always match the functions they're read with
+            if attempt > 0:
+                self._reseed(entries)
+            self._table_1 = self._new_buckets(capacity)
+            self._table_2 = self._new_buckets(capacity)
+            self._stash = []
+            for entry in entries:
+                entry = self._place(entry)
+                if entry is not None:
+                    self._stash.append(entry)
+            self._modifications += 1
+
+            if len(self._stash) <= self._stash_size:
+                return
+            if self._seed is None:
+                break
+
+        raise RuntimeError(f"{len(self._stash)} keys collide under both hash functions, "
+                           f"more than the stash holds ({self._stash_size})")
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, split between its
+        two tables, and rehashes all existing key/value pairs from their
+        cached hashes. The capacity is raised to what keeps the load
+        factor within max_load, since cuckoo inserts fail above it.
+        """
+        # if new capacity is less than the size, do nothing
+        if new_capacity < self._size:
+            return
+
+        new_capacity = max(new_capacity, math.ceil(self._size / self._max_load))
+        self._rebuild(next_prime((new_capacity + 1) // 2))
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the table once, if needed, so count more entries fit
+        without another resize along the way.
+        """
+        size = self._size + count
+        if size <= self._max_load * self.get_capacity():
+            return
+        self.resize_table(max(int(size / self._max_load) + 1, self.get_capacity() * 2))
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new value.
+        If the given key is not in the hash map, a key/value pair is added.
+        """
+        self._put(key, self._hash_function(key), value)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, given the key's hash
+        under the first function.
+        """
+        _, _, entry, hash_2 = self._find(key, hash)
+        if entry is not None:
+            entry.value = value
+            return
+
+        if (self._size + 1) > self._max_load * self.get_capacity():
+            seed = self._seed
+            self._rebuild(next_prime(self._capacity * 2))
+            if self._seed != seed:
+                hash, hash_2 = self._hash_function(key), self._hash_function_2(key)
+
+        entry = self._place(CuckooEntry(key, value, hash, hash_2))
+        self._size += 1
+        self._modifications += 1
+        if entry is not None:
+            self._stash.append(entry)
+            if len(self._stash) > self._stash_size:
+                self._rebuild(next_prime(self._capacity * 2))
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+        return self._get(key, self._hash_function(key), None)
+
+    def _get(self, key: str, hash: int, default: object) -> object:
+        """
+        Returns the value associated with the given key, given the key's
+        hash under the first function, or default if the key isn't in the
+        hash map.
+        """
+        _, _, entry, _ = self._find(key, hash)
+        if entry is None:
+            return default
+        return entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the given key is in the hash map; otherwise, returns false.
+        """
+        return self._get(key, self._hash_function(key), _MISSING) is not _MISSING
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key and its associated value from the hash map,
+        given the key's hash under the first function. Returns whether the
+        key was found.
+        """
+        table, index, _, _ = self._find(key, hash)
+        if table is None:
+            return False
+
+        if table is self._stash:
+            table.pop(index)
+        else:
+            # no tombstone needed: every key is in one of its two buckets
+            table.set_at_index(index, None)
+        self._size -= 1
+        self._modifications += 1
+        return True
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying table capacity.
+        """
+        self._table_1 = self._new_buckets(self._capacity)
+        self._table_2 = self._new_buckets(self._capacity)
+        self._stash = []
+        self._size = 0
+        self._modifications += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        return DynamicArray([(entry.key, entry.value) for entry in self._entries()])
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every key/value pair in pairs, which may be a DynamicArray
+        or any iterable of (key, value) tuples. The table is resized at most
+        once up front.
+        """
+        pairs = as_list(pairs)
+        self._reserve(len(pairs))
+        # not bound once: a rebuild may reseed the hash functions
+        put = self.put
+        for key, value in pairs:
+            put(key, value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value associated with each key
+        in keys (None for missing keys), in the same order. keys may be a
+        DynamicArray or any iterable.
+        """
+        keys = as_list(keys)
+        get, function = self._get, self._hash_function
+        return DynamicArray([get(key, function(key), None) for key in keys])
+
+    def remove_many(self, keys) -> int:
+        """
+        Removes every key in keys, which may be a DynamicArray or any
+        iterable, and returns how many of them were in the hash map.
+        """
+        keys = as_list(keys)
+        remove, function = self._remove, self._hash_function
+        removed = 0
+        for key in keys:
+            if remove(key, function(key)):
+                removed += 1
+        return removed
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Returns the number of key/value pairs in the hash map."""
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether key is in the hash map."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the value associated with key; raises KeyError if it's missing."""
+        value = self._get(key, self._hash_function(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """Updates the key/value pair in the hash map."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Removes key from the hash map; raises KeyError if it's missing."""
+        if not self._remove(key, self._hash_function(key)):
+            raise KeyError(key)
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return self.keys()
+
+    def _entries(self):
+        """
+        Yields every entry in both tables and then the stash.
+        """
+        for table in (self._table_1, self._table_2):
+            for i in range(table.length()):
+                entry = table.get_at_index(i)
+                if entry is not None:
+                    yield entry
+        yield from self._stash
+
+    def _items(self):
+        """
+        Lazily yields every (key, value) pair in the hash map. Raises
+        RuntimeError if entries are added, removed or moved while iterating;
+        updating the value of an existing key is fine.
+        """
+        modifications = self._modifications
+        for entry in self._entries():
+            if self._modifications != modifications:
+                raise RuntimeError("HashMap changed during iteration")
+            yield entry.key, entry.value
+
+        if self._modifications != modifications:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """Returns an iterator over the keys of the hash map."""
+        return (key for key, _ in self._items())
+
+    def values(self):
+        """Returns an iterator over the values of the hash map."""
+        return (value for _, value in self._items())
+
+    def items(self):
+        """Returns an iterator over the (key, value) pairs of the hash map."""
+        return self._items()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\ncuckoo put example")
+    print("------------------")
+    m = CuckooHashMap(53)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity(),
+                  m.get_stash_size())
+
+    print("\ncuckoo get/remove example")
+    print("-------------------------")
+    print(m.get('str42'), m.contains_key('str150'))
+    m.remove('str42')
+    print(m.get('str42'), m.get_size())
+
+    print("\ncuckoo compared with dict")
+    print("-------------------------")
+    m = CuckooHashMap(11, stash_size=2)
+    expected = {}
+    result = True
+    for i in range(3000):
+        key = 'key' + str(i * 7919 % 1000)
+        if i % 3 == 2:
+            m.remove(key)
+            expected.pop(key, None)
+        else:
+            m.put(key, i)
+            expected[key] = i
+        # the stash never grows past its limit
+        result &= m.get_stash_size() <= 2
+    m.resize_table(4 * m.get_size())
+    result &= dict(m.items()) == expected and len(m) == len(expected)
+    result &= all(m.get(key) == value for key, value in expected.items())
+    result &= not m.contains_key('key1000')
+    print(result, m.get_size(), m.get_capacity(), m.get_stash_size())
+
+    print("\ncuckoo batch example")
+    print("--------------------")
+    m = CuckooHashMap()
+    m.put_many(('k' + str(i), i) for i in range(500))
+    print(m.get_many(['k0', 'k499', 'k500']), m.remove_many(['k' + str(i) for i in range(0, 500, 2)]),
+          m.get_size(), sorted(m.values()) == list(range(1, 500, 2)))
+
+    print("\ncuckoo with the caller's hash functions")
+    print("---------------------------------------")
+    m = CuckooHashMap(53, hash_function_1, hash_function_2)
+    try:
+        for i in range(150):
+            m.put('str' + str(i), i * 100)
+    except RuntimeError as error:
+        print(error)
+    print(all(m.get('str' + str(j)) == j * 100 for j in range(i + 1)))
+
+    print("\ncuckoo after a failed rebuild")
+    print("-----------------------------")
+    # no stash and a single kick make rebuilds fail even after reseeding
+    m = CuckooHashMap(11, stash_size=0, max_kicks=1, max_load=0.49)
+    expected = {str(i): i for i in range(2000)}
+    m.put_many(expected.items())
+    try:
+        m.resize_table(m.get_size())
+    except RuntimeError as error:
+        print(error)
+    result = dict(m.items()) == expected and len(m) == len(expected)
+    result &= all(m.get(key) == value for key, value in expected.items())
+    print(result, m.get_size(), m.get_capacity())
@@ -0,0 +1,483 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: This program implements HopscotchHashMap, a hash map using
+# hopscotch hashing: open addressing where every key is kept within a
+# small neighborhood of buckets after its initial bucket, and each bucket
+# has a bitmap of which buckets in its neighborhood hold its keys. A get
+# only looks at the buckets the bitmap points to, all close together, so
+# the table can run at a high load factor without long probe chains.
+
+
+from array import array
+
+from include import DynamicArray, HashEntry, as_list, hash_function_1, hash_function_bytes, next_prime
+from hash_map_sc import HashMap
+
+
+# Returned by _get for missing keys, since None is a valid value
+_MISSING = object()
+
+
+class HopscotchHashMap:
+    """
+    Hash map using hopscotch hashing on one table of prime capacity.
+    A key whose hash gives initial bucket i is always in one of buckets
+    i to i + neighborhood - 1 (wrapping around), and bit d of bucket i's
+    bitmap is set when bucket i + d holds one of its keys. An insert takes
+    the nearest empty bucket; if that is outside the neighborhood, it hops
+    the empty bucket back by moving into it some earlier key that stays
+    within its own neighborhood, until the empty bucket is close enough.
+    If no key can move, the table doubles, unless it is less than half
+    full: then the neighborhood is crowded by keys sharing a hash, which
+    no capacity separates, so the key goes to an overflow SC HashMap that
+    lookups check after the neighborhood (only while it isn't empty). The
+    overflow map is only used through its public and mapping API.
+    Removes just clear the bucket and its bit, so there are no tombstones.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 neighborhood: int = 32,
+                 max_load: float = 0.85) -> None:
+        """
+        Initialize new HopscotchHashMap whose keys are kept within
+        neighborhood buckets of their initial bucket. The table doubles
+        once the load factor would go above max_load.
+        """
+        if not 1 <= neighborhood <= 64:
+            raise ValueError("neighborhood must be between 1 and 64")
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+
+        self._hash_function = function
+        self._neighborhood = neighborhood
+        self._max_load = max_load
+
+        self._capacity = next_prime(capacity)
+        self._buckets = self._new_buckets(self._capacity)
+        self._hops = self._new_hops(self._capacity)
+        self._overflow = HashMap(11, function, max_load=1.0)
+        self._size = 0
+
+        # bumped by every change that adds, removes or moves entries, so
+        # iterators can tell the map changed under them
+        self._modifications = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns a new table of capacity empty buckets.
+        """
+        return DynamicArray([None] * capacity)
+
+    @staticmethod
+    def _new_hops(capacity: int) -> array:
+        """
+        Returns the neighborhood bitmaps for a new table of capacity
+        empty buckets.
+        """
+        return array('Q', bytes(8 * capacity))
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._capacity - (self._size - self._overflow.get_size())
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> (int, HashEntry):
+        """
+        Returns the index of the bucket holding key and its entry, given the
+        key's hash, or (-1, None) if the key isn't in the table; it may
+        still be in the overflow map. Only the buckets set in the bitmap of
+        the key's initial bucket are looked at.
+        """
+        buckets = self._buckets
+        capacity = self._capacity
+        initial_index = hash % capacity
+        bits = self._hops[initial_index]
+        while bits:
+            low = bits & -bits
+            index = (initial_index + low.bit_length() - 1) % capacity
+            entry = buckets.get_at_index(index)
+            # compare cached hashes first; keys only when they match
+            if entry.hash == hash and entry.key == key:
+                return index, entry
+            bits ^= low
+
+        return -1, None
+
+    def _overflows(self, key: str) -> bool:
+        """
+        Returns whether key is in the overflow map.
+        """
+        return self._overflow.get_size() > 0 and key in self._overflow
+
+    def _place(self, entry: HashEntry) -> bool:
+        """
+        Puts entry, whose key isn't in the hash map, in the neighborhood of
+        its initial bucket, moving other keys within their neighborhoods to
+        make room. Returns False if that's impossible at this capacity;
+        keys moved by then stay where they were moved to.
+        """
+        buckets, hops = self._buckets, self._hops
+        capacity = self._capacity
+        neighborhood = self._neighborhood
+        initial_index = entry.hash % capacity
+
+        # find the nearest empty bucket
+        distance = 0
+        while buckets.get_at_index((initial_index + distance) % capacity) is not None:
+            distance += 1
+            if distance == capacity:
+                return False
+
+        # hop it back until it's within the entry's neighborhood: look for
+        # the earliest key in the neighborhood-1 buckets before it whose own
+        # neighborhood reaches it, and move that key into it
+        while distance >= neighborhood:
+            empty = (initial_index + distance) % capacity
+            for back in range(neighborhood - 1, 0, -1):
+                home = (empty - back) % capacity
+                bits = hops[home] & ((1 << back) - 1)
+                if bits:
+                    offset = (bits & -bits).bit_length() - 1
+                    index = (home + offset) % capacity
+                    buckets.set_at_index(empty, buckets.get_at_index(index))
+                    buckets.set_at_index(index, None)
+                    hops[home] ^= (1 << offset) | (1 << back)
+                    distance -= back - offset
+                    break
+            else:
+                return False
+
+        index = (initial_index + distance) % capacity
+        buckets.set_at_index(index, entry)
+        hops[initial_index] |= 1 << distance
+        return True
+
+    def _rebuild(self, capacity: int) -> None:
+        """
+        Puts every entry, including the overflowing ones, into a new table
+        of the given prime capacity. Entries that don't fit in their
+        neighborhood overflow.
+        """
+        entries = [entry for entry in self._buckets._data if entry is not None]
+        # overflowing keys are few, so they are simply hashed again
+        function = self._hash_function
+        entries.extend(HashEntry(key, value, function(key)) for key, value in self._overflow.items())
+
+        self._capacity = capacity
+        self._buckets = self._new_buckets(capacity)
+        self._hops = self._new_hops(capacity)
+        self._overflow.clear()
+        # the cached hash means the hash function isn't called again
+        overflowing = [(entry.key, entry.value) for entry in entries if not self._place(entry)]
+        self._overflow.put_many(overflowing)
+        self._modifications += 1
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table and rehashes all
+        existing key/value pairs from their cached hashes.
+        """
+        # if new capacity is less than the size, do nothing
+        if new_capacity < self._size:
+            return
+
+        self._rebuild(next_prime(new_capacity))
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the table once, if needed, so count more entries fit
+        without another resize along the way.
+        """
+        size = self._size + count
+        if size <= self._max_load * self._capacity:
+            return
+        self.resize_table(max(int(size / self._max_load) + 1, self._capacity * 2))
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new value.
+        If the given key is not in the hash map, a key/value pair is added.
+        """
+        self._put(key, self._hash_function(key), value)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, given the key's hash.
+        """
+        _, entry = self._find(key, hash)
+        if entry is not None:
+            entry.value = value
+            return
+        if self._overflows(key):
+            self._overflow.put(key, value)
+            return
+
+        if self._size + 1 > self._max_load * self._capacity:
+            self._rebuild(next_prime(self._capacity * 2))
+
+        entry = HashEntry(key, value, hash)
+        if not self._place(entry):
+            if self._size >= self._max_load * self._capacity / 2:
+                self._rebuild(next_prime(self._capacity * 2))
+            if not self._place(entry):
+                self._overflow.put(key, value)
+        self._size += 1
+        self._modifications += 1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+        return self._get(key, self._hash_function(key), None)
+
+    def _get(self, key: str, hash: int, default: object) -> object:
+        """
+        Returns the value associated with the given key, given the key's
+        hash, or default if the key isn't in the hash map.
+        """
+        _, entry = self._find(key, hash)
+        if entry is not None:
+            return entry.value
+        if self._overflows(key):
+            return self._overflow[key]
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the given key is in the hash map; otherwise, returns false.
+        """
+        _, entry = self._find(key, self._hash_function(key))
+        return entry is not None or self._overflows(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key and its associated value from the hash map,
+        given the key's hash. Returns whether the key was found.
+        """
+        index, entry = self._find(key, hash)
+        if entry is not None:
+            initial_index = hash % self._capacity
+            self._buckets.set_at_index(index, None)
+            self._hops[initial_index] ^= 1 << ((index - initial_index) % self._capacity)
+        elif self._overflows(key):
+            del self._overflow[key]
+        else:
+            return False
+        self._size -= 1
+        self._modifications += 1
+        return True
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying table capacity.
+        """
+        self._buckets = self._new_buckets(self._capacity)
+        self._hops = self._new_hops(self._capacity)
+        self._overflow.clear()
+        self._size = 0
+        self._modifications += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        return DynamicArray([(key, value) for key, value in self._items()])
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every key/value pair in pairs, which may be a DynamicArray
+        or any iterable of (key, value) tuples. The table is resized at most
+        once up front.
+        """
+        pairs = as_list(pairs)
+        self._reserve(len(pairs))
+        put, function = self._put, self._hash_function
+        for key, value in pairs:
+            put(key, function(key), value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value associated with each key
+        in keys (None for missing keys), in the same order. keys may be a
+        DynamicArray or any iterable.
+        """
+        keys = as_list(keys)
+        get, function = self._get, self._hash_function
+        return DynamicArray([get(key, function(key), None) for key in keys])
+
+    def remove_many(self, keys) -> int:
+        """
+        Removes every key in keys, which may be a DynamicArray or any
+        iterable, and returns how many of them were in the hash map.
+        """
+        keys = as_list(keys)
+        remove, function = self._remove, self._hash_function
+        removed = 0
+        for key in keys:
+            if remove(key, function(key)):
+                removed += 1
+        return removed
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Returns the number of key/value pairs in the hash map."""
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether key is in the hash map."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> object:
+        """Returns the value associated with key; raises KeyError if it's missing."""
+        value = self._get(key, self._hash_function(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """Updates the key/value pair in the hash map."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Removes key from the hash map; raises KeyError if it's missing."""
+        if not self._remove(key, self._hash_function(key)):
+            raise KeyError(key)
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return self.keys()
+
+    def _items(self):
+        """
+        Lazily yields every (key, value) pair in the hash map. Raises
+        RuntimeError if entries are added, removed or moved while iterating;
+        updating the value of an existing key is fine.
+        """
+        modifications = self._modifications
+        buckets = self._buckets
+        for i in range(buckets.length()):
+            entry = buckets.get_at_index(i)
+            if entry is None:
+                continue
+            if self._modifications != modifications:
+                raise RuntimeError("HashMap changed during iteration")
+            yield entry.key, entry.value
+
+        for key, value in self._overflow.items():
+            if self._modifications != modifications:
+                raise RuntimeError("HashMap changed during iteration")
+            yield key, value
+
+        if self._modifications != modifications:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """Returns an iterator over the keys of the hash map."""
+        return (key for key, _ in self._items())
+
+    def values(self):
+        """Returns an iterator over the values of the hash map."""
+        return (value for _, value in self._items())
+
+    def items(self):
+        """Returns an iterator over the (key, value) pairs of the hash map."""
+        return self._items()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nhopscotch put example")
+    print("---------------------")
+    m = HopscotchHashMap(53, hash_function_1, neighborhood=8)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nhopscotch get/remove example")
+    print("----------------------------")
+    print(m.get('str42'), m.contains_key('str150'))
+    m.remove('str42')
+    print(m.get('str42'), m.get_size())
+
+    print("\nhopscotch compared with dict")
+    print("----------------------------")
+    m = HopscotchHashMap(11, hash_function_bytes, neighborhood=8)
+    expected = {}
+    for i in range(3000):
+        key = str(i * 7919 % 1000)
+        if i % 3 == 2:
+            m.remove(key)
+            expected.pop(key, None)
+        else:
+            m.put(key, i)
+            expected[key] = i
+    m.resize_table(4 * m.get_size())
+    result = dict(m.items()) == expected and len(m) == len(expected)
+    result &= all(m.get(key) == value for key, value in expected.items())
+    result &= not m.contains_key('1000')
+    print(result, m.get_size(), m.get_capacity(), m.empty_buckets())
+
+    print("\nhopscotch overflow example")
+    print("--------------------------")
+    # anagrams share a hash_function_1 value, so most of them overflow
+    m = HopscotchHashMap(11, hash_function_1, neighborhood=8)
+    keys = [a + b + c + d for a in 'abcd' for b in 'abcd' for c in 'abcd' for d in 'abcd'
+            if len({a, b, c, d}) == 4]
+    m.put_many((key, i) for i, key in enumerate(keys))
+    expected = {key: i for i, key in enumerate(keys)}
+    for key in keys[::3]:
+        m[key] = -expected[key]
+        expected[key] = -expected[key]
+    print(m.remove_many(keys[::4]), m.get_size(), m.empty_buckets())
+    for key in keys[::4]:
+        del expected[key]
+    m.resize_table(100)
+    result = dict(m.items()) == expected
+    result &= all(m.get(key) == value for key, value in expected.items())
+    result &= not any(key in m for key in keys[::4])
+    print(result, m.get_size(), m.get_capacity(), m.empty_buckets())
@@ -0,0 +1,529 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Description: This program implements MmapHashMap, an open addressing
+# hash map kept in a file and accessed through mmap, so a large table opens
+# without being read into memory and can be shared read-only by several
+# processes. It uses the same quadratic probing and prime capacities as
+# the OA HashMap. Keys are strings and values are bytes.
+
+
+import io
+import mmap
+import os
+import struct
+
+from include import (DynamicArray, as_list, hash_function_builtin, hash_function_bytes,
+                     is_prime, next_prime, seeded_hash_function)
+from hash_map_oa import HashMap
+
+
+# File layout: a header, then one fixed-width record per bucket, then a heap
+# of length-prefixed key and value blobs that records point into.
+#   header: magic, format version, capacity, size, tombstones,
+#           end of the heap, name of the hash function, and the hash
+#           function's values for the probe keys below
+#   record: hash, key offset, value offset, state
+_MAGIC = b'OAHM'
+_VERSION = 2
+_HEADER = struct.Struct('<4sIQQQQ32s4Q')
+_RECORD = struct.Struct('<QQQB')
+_STATE = _RECORD.size - 1
+_LENGTH = struct.Struct('<I')
+
+# Record states; the zeros of a newly extended file read as empty buckets
+_EMPTY = 0
+_LIVE = 1
+_TOMBSTONE = 2
+
+# records store hashes as unsigned 64-bit integers
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Returned by _get for missing keys, since None is a valid value
+_MISSING = object()
+
+# fixed keys whose hashes identify the hash function, since the name alone
+# doesn't tell seeded_hash_function instances with different seeds apart
+_PROBE_KEYS = ('', 'a', 'MmapHashMap', 'probe key 3')
+
+
+class MmapHashMap:
+    """
+    Open addressing hash map stored in a memory-mapped file.
+
+    Lookups read records and keys straight from the mapping. A put appends
+    the key and value to the heap at the end of the file (a value of the
+    same length as the old one is overwritten in place), and a resize
+    writes a new file next to the old one and swaps it in, dropping values
+    that were overwritten or removed. Processes that still have the old
+    file open keep seeing it as it was.
+    """
+
+    # shared with the OA HashMap
+    _grown_capacity = HashMap._grown_capacity
+    _next_capacity = staticmethod(next_prime)
+
+    def __init__(self,
+                 path: str,
+                 capacity: int = 11,
+                 function: callable = hash_function_bytes,
+                 writable: bool = False) -> None:
+        """
+        Open the hash map stored at path, read-only unless writable is
+        true. If writable and there's no file at path yet, a new empty map
+        of capacity buckets is created there. function must give the same
+        hash in every process, and must be the one the file was created with.
+        """
+        if function is hash_function_builtin:
+            raise ValueError("hash_function_builtin differs between processes, so it can't be stored")
+
+        self._path = os.fspath(path)
+        self._hash_function = function
+        # hashes of the probe keys, as stored in the header
+        self._fingerprint = tuple(function(key) & _HASH_MASK for key in _PROBE_KEYS)
+        self._writable = writable
+        if writable and not os.path.exists(path):
+            self._create(path, next_prime(capacity))
+        self._open()
+
+    def _create(self, path: str, capacity: int) -> None:
+        """
+        Writes an empty map of capacity buckets to a new file at path.
+        """
+        heap_start = _HEADER.size + capacity * _RECORD.size
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, capacity, 0, 0, heap_start, self._function_name(),
+                                    *self._fingerprint))
+            # the file is extended with zeros, i.e. empty buckets
+            file.truncate(heap_start + mmap.PAGESIZE)
+
+    def _open(self) -> None:
+        """
+        Maps the file and reads its header.
+        """
+        self._file = open(self._path, 'r+b' if self._writable else 'rb')
+        access = mmap.ACCESS_WRITE if self._writable else mmap.ACCESS_READ
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+
+        magic, version, capacity, size, tombstones, heap_end, name, *fingerprint = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{self._path} is not an MmapHashMap file")
+        if version != _VERSION:
+            self.close()
+            raise ValueError(f"{self._path} has unsupported format version {version}")
+        name = name.rstrip(b'\x00')
+        if name != self._function_name():
+            self.close()
+            raise ValueError(f"{self._path} was built with hash function {name.decode('utf-8')}")
+        if tuple(fingerprint) != self._fingerprint:
+            self.close()
+            raise ValueError(f"{self._path} was built with a different {name.decode('utf-8')} "
+                             f"(another seed?): its hashes don't match")
+
+        self._capacity = capacity
+        self._size = size
+        self._tombstones = tombstones
+        self._heap_end = heap_end
+
+    def _function_name(self) -> bytes:
+        """
+        Returns the name of the hash function as stored in the header.
+        """
+        return self._hash_function.__name__.encode('utf-8')[:32]
+
+    def _write_header(self) -> None:
+        """
+        Stores the size, tombstone count and end of the heap in the header.
+        """
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, self._capacity, self._size,
+                          self._tombstones, self._heap_end, self._function_name(), *self._fingerprint)
+
+    def _check_writable(self) -> None:
+        """
+        Raises io.UnsupportedOperation if the map was opened read-only.
+        """
+        if not self._writable:
+            raise io.UnsupportedOperation("MmapHashMap was opened read-only")
+
+    def flush(self) -> None:
+        """
+        Writes any changes through to the file.
+        """
+        if self._writable:
+            self._mm.flush()
+
+    def close(self) -> None:
+        """
+        Flushes any changes and closes the file.
+        """
+        if not self._mm.closed:
+            self.flush()
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "MmapHashMap":
+        """Returns the map for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Closes the map at the end of a with statement."""
+        self.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def get_tombstones(self) -> int:
+        """
+        Returns the number of tombstones (removed entries) in the table.
+        """
+        return self._tombstones
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    # ----------------------- Records and heap ----------------------- #
+
+    def _read_blob(self, offset: int) -> bytes:
+        """
+        Returns the blob stored in the heap at offset.
+        """
+        start = offset + _LENGTH.size
+        return self._mm[start:start + _LENGTH.unpack_from(self._mm, offset)[0]]
+
+    def _append_blob(self, data: bytes) -> int:
+        """
+        Appends data to the heap and returns its offset, growing the file
+        (at least doubling it) when it's full.
+        """
+        offset = self._heap_end
+        end = offset + _LENGTH.size + len(data)
+        if end > len(self._mm):
+            new_length = max(end, 2 * len(self._mm))
+            self._mm.close()
+            self._file.truncate(new_length)
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+        _LENGTH.pack_into(self._mm, offset, len(data))
+        self._mm[offset + _LENGTH.size:end] = data
+        self._heap_end = end
+        return offset
+
+    def _find_slot(self, key: bytes, hash: int) -> (int, int, bool):
+        """
+        Walks the quadratic probe sequence for the encoded key exactly once,
+        starting from the given hash of the key.
+        Returns a tuple of the index where the probe stopped, the index
+        of the first tombstone passed along the way (-1 if none), and
+        whether the key was found at the returned index.
+        """
+        mm = self._mm
+        capacity = self._capacity
+        initial_index = hash % capacity
+        index = initial_index
+        first_tombstone = -1
+
+        j = 0  # quadratic probing value
+        while j < capacity:
+            record_hash, key_offset, _, state = _RECORD.unpack_from(mm, _HEADER.size + index * _RECORD.size)
+            if state == _EMPTY:
+                return index, first_tombstone, False
+            if state == _TOMBSTONE:
+                if first_tombstone == -1:
+                    first_tombstone = index
+            # compare cached hashes first; keys only when they match
+            elif record_hash == hash and self._read_blob(key_offset) == key:
+                return index, first_tombstone, True
+            j += 1
+            index = (initial_index + j * j) % capacity
+
+        return index, first_tombstone, False
+
+    def _records(self):
+        """
+        Lazily yields the index, hash, key offset and value offset of every
+        live record.
+        """
+        mm = self._mm
+        for index in range(self._capacity):
+            hash, key_offset, value_offset, state = _RECORD.unpack_from(mm, _HEADER.size + index * _RECORD.size)
+            if state == _LIVE:
+                yield index, hash, key_offset, value_offset
+
+    # ------------------------ Map operations ------------------------ #
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new value.
+        If the given key is not in the hash map, a key/value pair is added.
+        """
+        self._check_writable()
+        self._grow_if_needed()
+        self._put(key.encode('utf-8'), self._hash_function(key) & _HASH_MASK, value)
+
+    def _put(self, key: bytes, hash: int, value: bytes) -> None:
+        """
+        Updates the key/value pair in the hash map, given the encoded key
+        and its hash. There must be room for one more entry.
+        """
+        index, first_tombstone, found = self._find_slot(key, hash)
+        offset = _HEADER.size + index * _RECORD.size
+
+        # if key already in hash map, replace its value
+        if found is True:
+            _, key_offset, value_offset, _ = _RECORD.unpack_from(self._mm, offset)
+            if _LENGTH.unpack_from(self._mm, value_offset)[0] == len(value):
+                start = value_offset + _LENGTH.size
+                self._mm[start:start + len(value)] = value
+                return
+            # appending may remap the file, so append before writing the record
+            value_offset = self._append_blob(value)
+            _RECORD.pack_into(self._mm, offset, hash, key_offset, value_offset, _LIVE)
+            self._write_header()
+            return
+
+        # otherwise reuse the first tombstone on the probe path, if any
+        if first_tombstone != -1:
+            offset = _HEADER.size + first_tombstone * _RECORD.size
+            self._tombstones -= 1
+
+        key_offset = self._append_blob(key)
+        value_offset = self._append_blob(value)
+        _RECORD.pack_into(self._mm, offset, hash, key_offset, value_offset, _LIVE)
+        self._size += 1
+        self._write_header()
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every key/value pair in pairs, which may be a DynamicArray
+        or any iterable of (key, value) tuples. The table is resized at most
+        once up front.
+        """
+        self._check_writable()
+        pairs = as_list(pairs)
+        if (self._size + self._tombstones + len(pairs)) * 2 > self._capacity:
+            self.resize_table((self._size + len(pairs)) * 2)
+
+        put, function = self._put, self._hash_function
+        for key, value in pairs:
+            put(key.encode('utf-8'), function(key) & _HASH_MASK, value)
+
+    def get(self, key: str) -> bytes:
+        """
+        Returns the value associated with the given key.
+        """
+        return self._get(key, None)
+
+    def _get(self, key: str, default: object) -> bytes:
+        """
+        Returns the value associated with the given key, or default if the
+        key isn't in the hash map.
+        """
+        if self._size == 0:
+            return default
+
+        index, _, found = self._find_slot(key.encode('utf-8'), self._hash_function(key) & _HASH_MASK)
+        if found is False:
+            return default
+        return self._read_blob(_RECORD.unpack_from(self._mm, _HEADER.size + index * _RECORD.size)[2])
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the given key is in the hash map; otherwise, returns false.
+        """
+        return self._get(key, _MISSING) is not _MISSING
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._remove(key)
+
+    def _remove(self, key: str) -> bool:
+        """
+        Removes the given key and its associated value from the hash map.
+        Returns whether the key was found.
+        """
+        self._check_writable()
+        if self._size == 0:
+            return False
+
+        index, _, found = self._find_slot(key.encode('utf-8'), self._hash_function(key) & _HASH_MASK)
+        if found is False:
+            return False
+
+        self._mm[_HEADER.size + index * _RECORD.size + _STATE] = _TOMBSTONE
+        self._size -= 1
+        self._tombstones += 1
+        self._write_header()
+        return True
+
+    def _grow_if_needed(self) -> None:
+        """
+        Makes room for one more entry before an insert: if live entries and
+        tombstones fill half the table, either rebuilds it at the same
+        capacity (when most of them are tombstones) or resizes to double
+        the current capacity.
+        """
+        if (self._size + self._tombstones) / self._capacity >= 0.5:
+            if self._tombstones > self._size:
+                self.resize_table(self._capacity)
+            else:
+                self.resize_table(self._capacity * 2)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the hash table by writing a new file with
+        every live entry, rehashed from its cached hash, and swapping it in.
+        """
+        self._check_writable()
+
+        # if new capacity is less than the size, do nothing
+        if new_capacity < self._size:
+            return
+
+        # check that new capacity is prime; if it isn't, change to next highest prime
+        if is_prime(new_capacity) is False:
+            new_capacity = next_prime(new_capacity)
+        new_capacity = self._grown_capacity(new_capacity, self._size)
+
+        path = self._path + '.resize'
+        self._create(path, new_capacity)
+        new_map = MmapHashMap(path, function=self._hash_function, writable=True)
+        try:
+            for _, hash, key_offset, value_offset in self._records():
+                new_map._put(self._read_blob(key_offset), hash, self._read_blob(value_offset))
+        finally:
+            new_map.close()
+
+        self.close()
+        os.replace(path, self._path)
+        self._open()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying table capacity.
+        """
+        self._check_writable()
+        path = self._path + '.resize'
+        self._create(path, self._capacity)
+        self.close()
+        os.replace(path, self._path)
+        self._open()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        return DynamicArray(list(self.items()))
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Returns the number of key/value pairs in the hash map."""
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        """Returns whether key is in the hash map."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> bytes:
+        """Returns the value associated with key; raises KeyError if it's missing."""
+        value = self._get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: bytes) -> None:
+        """Updates the key/value pair in the hash map."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Removes key from the hash map; raises KeyError if it's missing."""
+        if not self._remove(key):
+            raise KeyError(key)
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return self.keys()
+
+    def keys(self):
+        """Returns an iterator over the keys of the hash map."""
+        return (self._read_blob(key_offset).decode('utf-8') for _, _, key_offset, _ in self._records())
+
+    def values(self):
+        """Returns an iterator over the values of the hash map."""
+        return (self._read_blob(value_offset) for _, _, _, value_offset in self._records())
+
+    def items(self):
+        """Returns an iterator over the (key, value) pairs of the hash map."""
+        return ((self._read_blob(key_offset).decode('utf-8'), self._read_blob(value_offset))
+                for _, _, key_offset, value_offset in self._records())
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    print("\nmmap put and reopen example")
+    print("---------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'example.map')
+        with MmapHashMap(path, 11, writable=True) as m:
+            for i in range(50):
+                m.put('str' + str(i), str(i * 100).encode('utf-8'))
+            m.remove('str7')
+            print(m.get_size(), m.get_capacity(), m.get_tombstones())
+
+        with MmapHashMap(path) as m:
+            print(m.get_size(), m.get_capacity(), m.get('str42'), m.contains_key('str7'))
+
+    print("\nmmap compared with dict")
+    print("-----------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'example.map')
+        expected = {}
+        with MmapHashMap(path, 11, seeded_hash_function(1), writable=True) as m:
+            for i in range(3000):
+                key = str(i * 7919 % 1000)
+                if i % 3 == 2:
+                    m.remove(key)
+                    expected.pop(key, None)
+                else:
+                    m.put(key, str(i).encode('utf-8'))
+                    expected[key] = str(i).encode('utf-8')
+            m.resize_table(2 * m.get_size())
+
+        with MmapHashMap(path, function=seeded_hash_function(1)) as m:
+            result = dict(m.items()) == expected
+            result &= all(m.get(key) == value for key, value in expected.items())
+            result &= not m.contains_key('1000')
+            print(result, m.get_size(), m.get_capacity(), m.get_tombstones())
+
+        # the same function with another seed is refused, not silently missed
+        try:
+            MmapHashMap(path, function=seeded_hash_function(2))
+        except ValueError as error:
+            print(error.args[0].replace(path, 'example.map'))
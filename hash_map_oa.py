@@ -5,32 +5,107 @@
 # Due Date: August 9, 2022
 # Description: This program implements the HashMap class using a
 # dynamic array to store the hash table and implements
-# open addressing with quadratic probing for collision resolution.
+# open addressing with quadratic probing for collision resolution
+# (or, if chosen, linear or triangular probing or double hashing).
 # It includes several methods, including the following:
 # put, get, remove, contains_key, clear, empty_buckets,
-# resize_table, table_load, and get_keys_and_values.
+# resize_table, table_load, and get_keys_and_values. FlatHashMap
+# is the same hash map stored in parallel arrays instead of HashEntry
+# objects, and RobinHoodHashMap resolves collisions with Robin Hood
+# hashing and backward-shift deletion instead.
 
 
-from a6_include import (DynamicArray, HashEntry,
-                        hash_function_1, hash_function_2)
+import io
+import itertools
+import pickle
+import struct
+from array import array
+
+from include import (DynamicArray, HashEntry, as_list, dump_hashes, load_hashes,
+                     hash_function_1, hash_function_2, hash_function_int,
+                     is_prime, mixed_hash_function, next_power_of_two, next_prime)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed by HashMap.from_arrays
+    np = None
+
+
+# Placed in the old table's buckets as their entries move to the new table
+# during an incremental resize; as a tombstone, probes for other keys pass it
+_MIGRATED = HashEntry(None, None)
+_MIGRATED.is_tombstone = True
+
+# Returned by _get for missing keys, since None is a valid value
+_MISSING = object()
+
+# Bucket states, as stored by FlatHashMap and written by dump
+_EMPTY = 0
+_LIVE = 1
+_TOMBSTONE = 2
+
+# Probe sequences HashMap can walk: each probe moves step buckets on from
+# the last one, starting at 1 (or at the second hash for double hashing),
+# and step grows by the given amount after every probe. Quadratic probing
+# visits initial + j * j since (j + 1) ** 2 - j ** 2 = 2 * j + 1; on a power
+# of two table it visits initial + j * (j + 1) / 2 instead, the quadratic
+# sequence that reaches every bucket of such a table.
+_PROBE_GROWTH = {'linear': 0, 'quadratic': 2, 'triangular': 1, 'double': 0}
+
+# Placed in the buckets of removed entries by load; tombstones restored from
+# a dump have no key or value left
+_REMOVED = HashEntry(None, None)
+_REMOVED.is_tombstone = True
+
+# Start of a dump: magic number and format version
+_DUMP_HEADER = struct.Struct('<4sH')
+_DUMP_MAGIC = b'HMOA'
+_DUMP_VERSION = 4
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    # load factor a table grows past, for subclasses that make it a setting;
+    # HashMap itself always keeps its load at 0.5
+    _max_load = None
+
+    def __init__(self, capacity: int, function, rehash_step: int = None,
+                 probing: str = 'quadratic', step_function: callable = hash_function_2,
+                 power_of_two: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        quadratic probing for collision resolution.
+        If rehash_step is given, resizes are incremental: the old table is
+        kept next to the new one and every put, get, contains_key and
+        remove moves rehash_step old buckets over.
+        probing picks the probe sequence instead: 'linear', 'quadratic',
+        'triangular' or 'double' (double hashing, stepping by
+        step_function(key) buckets, modulo the capacity minus one).
+        If power_of_two is true, capacities are powers of two instead of
+        primes, so resizes skip the prime search, and the hashes are mixed
+        by mixed_hash_function so their low bits alone pick good buckets.
         """
-        self._buckets = DynamicArray()
+        if rehash_step is not None and rehash_step < 1:
+            raise ValueError("rehash_step must be at least 1")
+        self._power_of_two = power_of_two
+        self._set_probing(probing, step_function)
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        # capacity must be a prime number (a power of two in power of two mode)
+        self._capacity = self._next_capacity(capacity)
+        self._buckets = self._new_buckets(self._capacity)
 
-        self._hash_function = function
+        self._hash_function = mixed_hash_function(function) if power_of_two else function
         self._size = 0
+        self._tombstones = 0
+
+        # incremental resize state; _old_size counts live entries still in the old table
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_size = 0
+        self._rehash_index = 0
+
+        # bumped by every change that adds, removes or moves entries, so
+        # iterators can tell the map changed under them
+        self._modifications = 0
 
     def __str__(self) -> str:
         """
@@ -75,6 +150,15 @@ class HashMap:
 
         return True
 
+    def _next_capacity(self, capacity: int) -> int:
+        """
+        Returns the smallest capacity the table can have that is at least
+        capacity: the next prime, or in power of two mode the next power of two.
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        return next_prime(capacity)
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -89,48 +173,340 @@ class HashMap:
         """
         return self._capacity
 
-    # ------------------------------------------------------------------ #
+    def get_tombstones(self) -> int:
+        """
+        Return number of tombstones in the map
+        """
+        return self._tombstones
 
-    def put(self, key: str, value: object) -> None:
+    def _set_probing(self, probing: str, step_function: callable) -> None:
         """
-        Updates the key/value pair in the hash map.
+        Sets the probe sequence of the (empty) table. The name is written by
+        dump, so load only reuses the table of a map that probed the same way.
         """
-        # if load factor > 0.5, resize to double current capacity
-        load_factor = self.table_load()
-        if load_factor >= 0.5:
-            new_capacity = self.get_capacity() * 2
-            self.resize_table(new_capacity)
+        if probing not in _PROBE_GROWTH:
+            raise ValueError(f"unknown probing {probing!r}")
 
-        # create entry and get capacity of hash table
-        entry = HashEntry(key, value)
-        capacity = self._capacity
+        self._probing = probing
+        self._probe_growth = _PROBE_GROWTH[probing]
+        if self._power_of_two and probing == 'quadratic':
+            self._probe_growth = _PROBE_GROWTH['triangular']
+        self._step_function = step_function if probing == 'double' else None
 
-        # find array index and entry at that location
-        hash = self._hash_function(key)
-        initial_index = hash % self._buckets.length()
-        index = initial_index
-        bucket = self._buckets.get_at_index(index)
-        capacity = self._capacity
+    def _first_step(self, key: str, capacity: int) -> int:
+        """
+        Returns how many buckets the first probe for key moves on from its
+        initial bucket in a table of capacity buckets.
+        """
+        if self._step_function is None:
+            return 1
+        # any odd step visits every bucket of a power of two table, and any
+        # step from 1 to capacity - 1 every bucket of a prime one
+        if self._power_of_two:
+            return self._step_function(key) | 1
+        return 1 + self._step_function(key) % (capacity - 1)
 
+    # ------------------------------------------------------------------ #
 
-        if self.contains_key(key) is True:
-            j = 0  # quadratic probing value
-            # probe until you find the key
-            while bucket.key != key:
-                j += 1
-                index = (initial_index + j * j) % capacity
-                bucket = self._buckets.get_at_index(index)
-            self._buckets.set_at_index(index, entry)
+    @classmethod
+    def from_arrays(cls, keys, values, function: callable = hash_function_int,
+                    capacity: int = 11, rehash_step: int = None,
+                    probing: str = 'quadratic', step_function: callable = None,
+                    power_of_two: bool = False) -> "HashMap":
+        """
+        Builds a hash map from a NumPy array (or sequence) of keys and a
+        matching sequence of values, as if each pair had been put in order
+        into HashMap(capacity, function, rehash_step, probing, step_function,
+        power_of_two). Integer keys are stored as ints and bytes keys as bytes.
+        step_function defaults to function's hashes mixed twice over by
+        mixed_hash_function, which works for whatever keys function takes
+        (the string hash_function_2 doesn't) and differs from the hash that
+        picks the initial bucket, even in power of two mode.
+        If function has a "vectorized" NumPy version (like hash_function_int
+        and hash_function_binary) all keys are hashed in one array operation.
+        Keys that land in a free bucket are placed without probing; only the
+        collisions are resolved one by one, with the usual probe sequence.
+        """
+        if np is None:
+            raise ImportError("HashMap.from_arrays requires NumPy")
+
+        keys = np.asarray(keys)
+        values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        if keys.ndim != 1 or len(keys) != len(values):
+            raise ValueError("keys and values must be one-dimensional and of the same length")
+
+        if step_function is None:
+            step_function = mixed_hash_function(mixed_hash_function(function))
+        map = cls(capacity, function, rehash_step, probing, step_function, power_of_two)
+        if len(keys) == 0:
+            return map
+
+        # the last value given for a key wins, like it would with repeated puts
+        _, last = np.unique(keys[::-1], return_index=True)
+        order = np.sort(len(keys) - 1 - last)
+        keys = keys[order]
+        values = [values[i] for i in order.tolist()]
+        key_list = keys.tolist()
+        size = len(key_list)
+
+        function = map._hash_function
+        vectorized = getattr(function, 'vectorized', None)
+        if vectorized is not None:
+            hashes = vectorized(keys)
         else:
-            j = 0  # quadratic probing value
-            # probe until you find the key
-            while bucket is not None and bucket.is_tombstone is False:
-                j += 1
-                index = (initial_index + j * j) % capacity
-                bucket = self._buckets.get_at_index(index)
+            hashes = np.array([function(key) for key in key_list], dtype=object)
+        hashes = map._cache_hashes(hashes)
+
+        map._capacity = map._grown_capacity(map._capacity, size)
+        map._buckets = map._new_buckets(map._capacity)
+        capacity = map._capacity
+
+        # the first key to hash to each bucket gets it without probing
+        initial = (hashes % capacity).astype(np.int64)
+        _, first = np.unique(initial, return_index=True)
+        occupied = np.zeros(capacity, dtype=np.uint8)
+        occupied[initial[first]] = 1
+        colliding = np.ones(size, dtype=bool)
+        colliding[first] = False
+
+        # the rest probe the usual sequence for a free bucket
+        occupied = bytearray(occupied.tobytes())
+        slots = initial.tolist()
+        growth = map._probe_growth
+        for i in np.flatnonzero(colliding).tolist():
+            index = slots[i]
+            step = map._first_step(key_list[i], capacity)
+            while occupied[index]:
+                index = (index + step) % capacity
+                step += growth
+            occupied[index] = 1
+            slots[i] = index
+
+        map._fill(slots, key_list, values, hashes.tolist())
+        map._size = size
+        return map
+
+    def _cache_hashes(self, hashes):
+        """
+        Returns an array of hashes in the form this map caches them.
+        """
+        return hashes
+
+    def _fill(self, slots: list, keys: list, values: list, hashes: list) -> None:
+        """
+        Stores each key/value pair and its hash in the matching bucket of
+        slots, which must all be empty.
+        """
+        buckets = self._buckets
+        for index, key, value, hash in zip(slots, keys, values, hashes):
+            buckets.set_at_index(index, HashEntry(key, value, hash))
+
+    def _new_buckets(self, capacity: int) -> DynamicArray:
+        """
+        Returns a new table of capacity empty buckets.
+        """
+        return DynamicArray([None] * capacity)
+
+    def _find_slot(self, buckets: DynamicArray, key: str, hash: int) -> (int, int, bool):
+        """
+        Walks the probe sequence for key through buckets exactly once,
+        starting from the given hash of the key.
+        Returns a tuple of the index where the probe stopped, the index
+        of the first tombstone passed along the way (-1 if none), and
+        whether the key was found at the returned index.
+        """
+        capacity = buckets.length()
+        index = hash % capacity
+        first_tombstone = -1
+        step = self._first_step(key, capacity)
+        growth = self._probe_growth
+
+        j = 0  # number of probes so far
+        # probe until the key or an empty bucket is found; stop after
+        # capacity steps so a table without empty buckets can't loop forever
+        while j < capacity:
+            bucket = buckets.get_at_index(index)
+            if bucket is None:
+                return index, first_tombstone, False
+            if bucket.is_tombstone is True:
+                if first_tombstone == -1:
+                    first_tombstone = index
+            # compare cached hashes first; keys only when they match
+            elif bucket.hash == hash and bucket.key == key:
+                return index, first_tombstone, True
+            j += 1
+            index = (index + step) % capacity
+            step += growth
+
+        return index, first_tombstone, False
+
+    def _locate(self, key: str, hash: int) -> (DynamicArray, int):
+        """
+        Returns the table holding key (the current one, or the old one
+        during an incremental resize) and the key's index in it.
+        Returns (None, -1) if the key isn't in the hash map.
+        """
+        index, _, found = self._find_slot(self._buckets, key, hash)
+        if found is True:
+            return self._buckets, index
+
+        if self._old_buckets is not None:
+            index, _, found = self._find_slot(self._old_buckets, key, hash)
+            if found is True:
+                return self._old_buckets, index
+
+        return None, -1
+
+    def _migrate_buckets(self, count: int) -> None:
+        """
+        Moves the live entries of up to count old buckets into the new
+        table while an incremental resize is in progress, and drops the
+        old table once nothing is left in it.
+        """
+        old_buckets = self._old_buckets
+        old_capacity = old_buckets.length()
+        stop = min(self._rehash_index + count, old_capacity)
+        for i in range(self._rehash_index, stop):
+            entry = old_buckets.get_at_index(i)
+            if entry is None or entry.is_tombstone is True:
+                continue
+
+            # keys are unique across both tables, so just take the first free
+            # slot; the cached hash means the hash function isn't called again
+            index, first_tombstone, _ = self._find_slot(self._buckets, entry.key, entry.hash)
+            if first_tombstone != -1:
+                index = first_tombstone
+                self._tombstones -= 1
             self._buckets.set_at_index(index, entry)
-            self._size += 1
 
+            # leave a tombstone behind so probes for other old keys still pass
+            old_buckets.set_at_index(i, _MIGRATED)
+            self._old_size -= 1
+
+        self._rehash_index = stop
+        if stop == old_capacity or self._old_size == 0:
+            self._old_buckets = None
+
+    def _grow_if_needed(self) -> None:
+        """
+        Makes room for one more entry before an insert: if live entries and
+        tombstones fill half the table, either compacts in place (when most
+        of them are tombstones) or resizes to double the current capacity.
+        """
+        if (self._size + self._tombstones) / self._capacity >= 0.5:
+            if self._tombstones > self._size:
+                self.compact()
+            else:
+                new_capacity = self.get_capacity() * 2
+                self.resize_table(new_capacity)
+
+    def _grown_capacity(self, capacity: int, size: int) -> int:
+        """
+        Returns the capacity a table of the given prime capacity ends up at
+        if size new keys are put into it one at a time: it keeps doubling
+        while it would pass a load factor of 0.5.
+        """
+        while size > 0 and (size - 1) / capacity >= 0.5:
+            capacity = self._next_capacity(capacity * 2)
+        return capacity
+
+    def _start_rehash(self, new_capacity: int, buckets: DynamicArray = None) -> None:
+        """
+        Sets the current table aside as the old table and starts over with
+        buckets, by default a new empty table of new_capacity buckets,
+        finishing any resize that is still in progress first.
+        _migrate_buckets moves the entries over.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+        self._old_buckets = self._buckets
+        self._old_size = self._size
+        self._rehash_index = 0
+
+        self._capacity = new_capacity
+        self._buckets = self._new_buckets(new_capacity) if buckets is None else buckets
+        self._tombstones = 0
+        self._modifications += 1
+
+        if self._size == 0:
+            self._old_buckets = None
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the table once, if needed, so count more entries fit without
+        another resize along the way.
+        """
+        new_capacity = self._reserved_capacity(count)
+        if new_capacity is not None:
+            self.resize_table(new_capacity)
+
+    def _reserved_capacity(self, count: int) -> int:
+        """
+        Returns the capacity _reserve(count) would resize the table to, or
+        None if it wouldn't. A growing table at least doubles, so reserving
+        room batch by batch doesn't resize on every batch.
+        """
+        if (self._size + self._tombstones + count) * 2 <= self._capacity:
+            return None
+
+        new_capacity = (self._size + count) * 2
+        if new_capacity <= self._capacity:
+            # dropping the tombstones makes enough room; never shrink the table
+            return self._capacity
+        return max(new_capacity, self._capacity * 2)
+
+    def _count_new_keys(self, keys: list, hashes: list) -> int:
+        """
+        Returns how many distinct keys in keys, given their hashes, aren't
+        in the hash map yet, i.e. how many entries putting them all adds.
+        """
+        distinct = dict(zip(keys, hashes))
+        if self._size == 0:
+            return len(distinct)
+        get = self._get
+        return sum(1 for key, hash in distinct.items() if get(key, hash, _MISSING) is _MISSING)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+        self._put(key, self._hash_function(key), value)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, given the key's hash.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        self._grow_if_needed()
+
+        index, first_tombstone, found = self._find_slot(self._buckets, key, hash)
+
+        # if key already in hash map, update the value in place
+        if found is True:
+            self._buckets.get_at_index(index).value = value
+            return
+
+        # otherwise reuse the first tombstone on the probe path, if any
+        if first_tombstone != -1:
+            index = first_tombstone
+            self._tombstones -= 1
+
+        # a key still waiting in the old table moves over with its new value
+        if self._old_buckets is not None:
+            old_index, _, found = self._find_slot(self._old_buckets, key, hash)
+            if found is True:
+                entry = self._old_buckets.get_at_index(old_index)
+                self._old_buckets.set_at_index(old_index, _MIGRATED)
+                self._old_size -= 1
+                entry.value = value
+                self._buckets.set_at_index(index, entry)
+                return
+
+        self._buckets.set_at_index(index, HashEntry(key, value, hash))
+        self._size += 1
+        self._modifications += 1
 
     def table_load(self) -> float:
         """
@@ -144,59 +520,106 @@ class HashMap:
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the hash table.
+        Tombstones are not counted as empty.
         """
         capacity = self._capacity
-        size = self._size
-        empty = capacity - size
+        size = self._size - self._old_size
+        empty = capacity - size - self._tombstones
         return empty
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        Changes the capacity of the internal hash table and rehashes  all
-        existing key/value pairs.
+        Changes the capacity of the internal hash table and rehashes all
+        existing key/value pairs from their cached hashes. In incremental
+        mode the rehash is spread over the following operations instead
+        of done all at once.
         """
-        # if new capacity is less than 1, do nothing
-        if new_capacity < self._size:
+        new_capacity = self._target_capacity(new_capacity)
+        if new_capacity is None:
+            return
+
+        # outside incremental mode, move every existing entry in one pass
+        if self._rehash_step is None and self._old_buckets is None:
+            self._rehash(new_capacity)
             return
 
-        # check that new capacity is prime; if it isn't, change to next highest prime
-        if self._is_prime(new_capacity) is False:
-            new_capacity = self._next_prime(new_capacity)
+        self._start_rehash(new_capacity)
+        if self._rehash_step is None and self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
 
-        # store existing key/value pairs, update capacity, and clear hash table
-        elements = self.get_keys_and_values()
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live entry into a new table of new_capacity buckets in
+        a single pass over the current one. Keys are unique and the new
+        table has no tombstones, so each entry goes into the first empty
+        bucket of its probe sequence without comparing any keys.
+        """
+        old_buckets = self._buckets
+        buckets = self._new_buckets(new_capacity)
+        first_step = self._first_step
+        growth = self._probe_growth
+        for i in range(old_buckets.length()):
+            entry = old_buckets.get_at_index(i)
+            if entry is None or entry.is_tombstone is True:
+                continue
+
+            # the cached hash means the hash function isn't called again
+            index = entry.hash % new_capacity
+            step = first_step(entry.key, new_capacity)
+            while buckets.get_at_index(index) is not None:
+                index = (index + step) % new_capacity
+                step += growth
+            buckets.set_at_index(index, entry)
+
+        self._buckets = buckets
         self._capacity = new_capacity
-        self.clear()
+        self._tombstones = 0
+        self._modifications += 1
 
-        # rehash existing key/value pairs into newly cleared table
-        size = elements.length()
-        for i in range(size):
-            key, value = elements.get_at_index(i)
-            self.put(key, value)
+    def _target_capacity(self, new_capacity: int) -> int:
+        """
+        Returns the capacity resize_table(new_capacity) gives the table,
+        or None if it leaves the table alone.
+        """
+        # if new capacity is less than the size, do nothing
+        if new_capacity < self._size:
+            return None
+
+        # an incremental resize never gets to grow the table midway, so
+        # make sure everything fits at a load factor of at most 0.5
+        if self._rehash_step is not None:
+            new_capacity = max(new_capacity, self._size * 2)
+
+        # round new capacity up to the next prime (or power of two) unless it is one
+        if self._power_of_two or is_prime(new_capacity) is False:
+            new_capacity = self._next_capacity(new_capacity)
+
+        if self._rehash_step is None:
+            new_capacity = self._grown_capacity(new_capacity, self._size)
+        return new_capacity
 
     def get(self, key: str) -> object:
         """
         Returns the value associated with the given key.
         """
-        # if key isn't in hash table, do nothing
-        if self.contains_key(key) is False:
-            return None
+        return self._get(key, self._hash_function(key))
 
-        # find array index and entry at that location
-        hash = self._hash_function(key)
-        initial_index = hash % self._buckets.length()
-        index = initial_index
-        bucket = self._buckets.get_at_index(index)
-        capacity = self._capacity
+    def _get(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, given the key's
+        hash, or default if the key isn't in the hash map.
+        """
+        # if key isn't in hash table, do nothing
+        if self._size == 0:
+            return default
 
-        j = 0  # quadratic probing value
-        # probe until you find the key and return associated value
-        while bucket.key != key:
-            j += 1
-            index = (initial_index + j * j) % capacity
-            bucket = self._buckets.get_at_index(index)
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        buckets, index = self._locate(key, hash)
+        if buckets is None:
+            return default
 
-        return bucket.value
+        return buckets.get_at_index(index).value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -206,55 +629,64 @@ class HashMap:
         if self._size == 0:
             return False
 
-        # find array index and entry at that location
-        hash = self._hash_function(key)
-        initial_index = hash % self._buckets.length()
-        index = initial_index
-        bucket = self._buckets.get_at_index(index)
-        capacity = self._capacity
-
-        j = 0  # quadratic probing value
-        # probe until you find the key
-        while bucket is not None and (bucket.is_tombstone is True or bucket.key != key):
-            j += 1
-            index = (initial_index + j * j) % capacity
-            bucket = self._buckets.get_at_index(index)
-        if bucket is not None and bucket.key == key:
-            return True
-
-        return False
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        buckets, _ = self._locate(key, self._hash_function(key))
+        return buckets is not None
 
     def remove(self, key: str) -> None:
         """
         Removes the given key and its associated value from the hash map.
         """
-        # if key is in hash table, find it
-        if self.contains_key(key) is True:
-            # find array index and entry at that location
-            hash = self._hash_function(key)
-            initial_index = hash % self._buckets.length()
-            index = initial_index
-            bucket = self._buckets.get_at_index(index)
-            capacity = self._capacity
-
-            j = 0  # quadratic probing value
-            # probe until you find the key
-            while bucket.key != key:
-                j += 1
-                index = (initial_index + j * j) % capacity
-                bucket = self._buckets.get_at_index(index)
-            # remove key by setting tombstone to True and decrement hash table size
-            bucket.is_tombstone = True
-            self._size -= 1
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key and its associated value from the hash map,
+        given the key's hash. Returns whether the key was found.
+        """
+        if self._size == 0:
+            return False
+
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+
+        # if key is in hash table, set its tombstone and decrement hash table size
+        buckets, index = self._locate(key, hash)
+        if buckets is None:
+            return False
+
+        buckets.get_at_index(index).is_tombstone = True
+        self._size -= 1
+        self._modifications += 1
+        if buckets is self._buckets:
+            self._tombstones += 1
+        else:
+            self._old_size -= 1
+        return True
+
+    def compact(self) -> None:
+        """
+        Rehashes all live entries at the current capacity, dropping every
+        tombstone so probe sequences are as short as possible again.
+        """
+        if self._tombstones == 0:
+            return
+
+        self.resize_table(self._capacity)
 
     def clear(self) -> None:
         """
         Clears the contents of the hash map.
         """
-        self._buckets = DynamicArray()
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        self._buckets = self._new_buckets(self._capacity)
         self._size = 0
+        self._tombstones = 0
+        self._modifications += 1
+
+        self._old_buckets = None
+        self._old_size = 0
+        self._rehash_index = 0
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -273,8 +705,797 @@ class HashMap:
                 value = bucket.value
                 new_arr.append((key, value))
 
+        # include entries an incremental resize hasn't moved over yet
+        if self._old_buckets is not None:
+            for i in range(self._rehash_index, self._old_buckets.length()):
+                bucket = self._old_buckets.get_at_index(i)
+                if bucket is not None and bucket.is_tombstone is False:
+                    new_arr.append((bucket.key, bucket.value))
+
         return new_arr
 
+    def put_many(self, pairs) -> None:
+        """
+        Updates every key/value pair in pairs, which may be a DynamicArray
+        or any iterable of (key, value) tuples. The table is resized at most
+        once up front, and all keys are hashed in one pass.
+        """
+        pairs = as_list(pairs)
+        hashes = list(map(self._hash_function, [key for key, _ in pairs]))
+        self._reserve(self._count_new_keys([key for key, _ in pairs], hashes))
+
+        put = self._put
+        for (key, value), hash in zip(pairs, hashes):
+            put(key, hash, value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value associated with each key
+        in keys (None for missing keys), in the same order. keys may be a
+        DynamicArray or any iterable.
+        """
+        keys = as_list(keys)
+        get = self._get
+        return DynamicArray([get(key, hash) for key, hash in zip(keys, map(self._hash_function, keys))])
+
+    def remove_many(self, keys) -> int:
+        """
+        Removes every key in keys, which may be a DynamicArray or any
+        iterable, and returns how many of them were in the hash map.
+        """
+        keys = as_list(keys)
+        remove = self._remove
+        removed = 0
+        for key, hash in zip(keys, map(self._hash_function, keys)):
+            if remove(key, hash):
+                removed += 1
+        return removed
+
+    def merge(self, other, combine: callable = None) -> None:
+        """
+        Updates the hash map with every key/value pair of other, which may be
+        another HashMap (from either module, or built in another process),
+        any mapping, or an iterable of (key, value) pairs. If combine is given,
+        a key already in the hash map gets combine(current value, other's value)
+        instead of other's value, e.g. operator.add to merge partial counts.
+        Keys are rehashed with this hash map's function, since cached hashes
+        may come from another process.
+        """
+        if hasattr(other, 'items'):
+            other = other.items()
+
+        # not reserved up front: partial maps usually share most of their keys
+        get, put = self._get, self._put
+        for key, value in other:
+            hash = self._hash_function(key)
+            if combine is not None:
+                current = get(key, hash, _MISSING)
+                if current is not _MISSING:
+                    value = combine(current, value)
+            put(key, hash, value)
+
+    # -------------------------- Snapshots --------------------------- #
+
+    def dump(self, file) -> None:
+        """
+        Writes the hash map to the binary file object file: its settings,
+        then the state and cached hash of every bucket and the pickled keys
+        and values, so load can restore the exact same table without
+        probing or calling the hash function.
+        """
+        # settle any incremental resize so there's a single table to write
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+        states, hashes, keys, values = self._dump_buckets()
+        file.write(_DUMP_HEADER.pack(_DUMP_MAGIC, _DUMP_VERSION))
+        pickle.dump((self._capacity, self._size, self._tombstones, self._rehash_step, self._probing,
+                     self._power_of_two, self._max_load),
+                    file, pickle.HIGHEST_PROTOCOL)
+        file.write(states)
+        dump_hashes(file, hashes)
+        pickle.dump(keys, file, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(values, file, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file, function, step_function: callable = hash_function_2) -> "HashMap":
+        """
+        Returns a hash map read from the binary file object file, as written
+        by dump of any OA HashMap. function must be the hash function the
+        map was dumped with. A few keys are hashed again to check; if they
+        don't match (say, the function is randomized per process), or the
+        dumped map probed differently, the map is rebuilt by putting every
+        key instead. A map that probed by double hashing must be loaded with
+        the step_function it used. The dumped rehash_step and max_load carry
+        over where the class has them, and are ignored where it doesn't.
+        """
+        header = file.read(_DUMP_HEADER.size)
+        if len(header) != _DUMP_HEADER.size or header[:4] != _DUMP_MAGIC:
+            raise ValueError("not a dump of an OA HashMap")
+        _, version = _DUMP_HEADER.unpack(header)
+        if version != _DUMP_VERSION:
+            raise ValueError(f"unsupported dump version {version}")
+
+        capacity, size, tombstones, rehash_step, probing, power_of_two, max_load = pickle.load(file)
+        states = file.read(capacity)
+        if len(states) != capacity:
+            raise ValueError("file ends in the middle of the bucket states")
+        hashes = load_hashes(file)
+        keys = pickle.load(file)
+        values = pickle.load(file)
+
+        map = cls._for_load(capacity, function, rehash_step, max_load, power_of_two)
+        # the constructor rounds capacity up (2 becomes 3), but the dumped
+        # layout needs the exact capacity it was dumped at
+        map._capacity = capacity
+        map._buckets = map._new_buckets(capacity)
+        # a map walking one of the probe sequences walks the dumped map's
+        if probing in _PROBE_GROWTH and map._probing in _PROBE_GROWTH:
+            map._set_probing(probing, step_function)
+        live = (i for i in range(capacity) if states[i] == _LIVE)
+        if (probing == map._probing
+                and all(map._cache_hashes(map._hash_function(keys[i])) == hashes[i]
+                        for i in itertools.islice(live, 8))
+                and map._load_buckets(states, hashes, keys, values)):
+            map._size = size
+            map._tombstones = tombstones
+        else:
+            map.put_many([(keys[i], values[i]) for i in range(capacity) if states[i] == _LIVE])
+        return map
+
+    @classmethod
+    def _for_load(cls, capacity: int, function, rehash_step: int, max_load: float,
+                  power_of_two: bool) -> "HashMap":
+        """
+        Returns the empty hash map load fills, given the settings of the
+        dumped map. HashMap has no max_load setting, so it's ignored.
+        """
+        return cls(capacity, function, rehash_step, power_of_two=power_of_two)
+
+    def _dump_buckets(self) -> (bytes, list, list, list):
+        """
+        Returns the state of every bucket and, for live buckets, the cached
+        hash, key and value (0 and None for the other buckets).
+        """
+        capacity = self._capacity
+        states = bytearray(capacity)
+        hashes = [0] * capacity
+        keys = [None] * capacity
+        values = [None] * capacity
+        for i in range(capacity):
+            entry = self._buckets.get_at_index(i)
+            if entry is None:
+                continue
+            if entry.is_tombstone is True:
+                states[i] = _TOMBSTONE
+                continue
+            states[i] = _LIVE
+            hashes[i], keys[i], values[i] = entry.hash, entry.key, entry.value
+        return states, hashes, keys, values
+
+    def _load_buckets(self, states: bytes, hashes, keys: list, values: list) -> bool:
+        """
+        Fills the empty table from the output of _dump_buckets. Returns
+        whether it could use the hashes as they are.
+        """
+        buckets = self._buckets
+        for i, state in enumerate(states):
+            if state == _LIVE:
+                buckets.set_at_index(i, HashEntry(keys[i], values[i], hashes[i]))
+            elif state == _TOMBSTONE:
+                buckets.set_at_index(i, _REMOVED)
+        return True
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Return size of map."""
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether key is in the map using the in operator."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> object:
+        """Return value of key using [] syntax; raises KeyError if it's missing."""
+        value = self._get(key, self._hash_function(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """Set value of key using [] syntax."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Remove key using del; raises KeyError if it's missing."""
+        if not self._remove(key, self._hash_function(key)):
+            raise KeyError(key)
+
+    def __iter__(self):
+        """Return an iterator over the keys in the map."""
+        return self.keys()
+
+    def _live_items(self, buckets: DynamicArray, start: int = 0, stop: int = None):
+        """
+        Lazily yields the (key, value) pair of every live entry in buckets,
+        or only in buckets start up to stop.
+        """
+        stop = buckets.length() if stop is None else min(stop, buckets.length())
+        for i in range(start, stop):
+            entry = buckets.get_at_index(i)
+            if entry is not None and entry.is_tombstone is False:
+                yield entry.key, entry.value
+
+    def _items(self):
+        """
+        Lazily yields every (key, value) pair in the map, walking the
+        buckets directly. Raises RuntimeError if entries are added, removed
+        or moved while iterating; updating the value of an existing key is fine.
+        """
+        # settle any incremental resize so lookups during iteration don't move entries
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+        modifications = self._modifications
+        for item in self._live_items(self._buckets):
+            if self._modifications != modifications:
+                raise RuntimeError("HashMap changed during iteration")
+            yield item
+
+        if self._modifications != modifications:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """Return a lazy iterator over the keys in the map."""
+        return (key for key, _ in self._items())
+
+    def values(self):
+        """Return a lazy iterator over the values in the map."""
+        return (value for _, value in self._items())
+
+    def items(self):
+        """Return a lazy iterator over the (key, value) pairs in the map."""
+        return self._items()
+
+
+# FlatHashMap caches hashes as unsigned 64-bit integers
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class FlatBuckets:
+    """
+    Bucket table for FlatHashMap made of parallel arrays: a cached hash,
+    key and value per bucket plus one state byte (empty, live or tombstone).
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize a table of capacity empty buckets."""
+        self.hashes = array('Q', bytes(8 * capacity))
+        self.keys = [None] * capacity
+        self.values = [None] * capacity
+        self.states = bytearray(capacity)
+
+    def length(self) -> int:
+        """Return number of buckets in the table."""
+        return len(self.states)
+
+
+class FlatHashMap(HashMap):
+    """
+    Open addressing HashMap that stores its buckets in parallel arrays
+    instead of one HashEntry object per bucket. Updates overwrite the
+    value in place, and cached hashes let resizes skip calling the hash
+    function again and let probes skip most key comparisons.
+    """
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        buckets = self._buckets
+        out = ''
+        for i in range(buckets.length()):
+            state = buckets.states[i]
+            if state == _EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += (str(i) + ': K: ' + str(buckets.keys[i]) + ' V: ' + str(buckets.values[i])
+                        + ' TS: ' + str(state == _TOMBSTONE) + '\n')
+        return out
+
+    def _new_buckets(self, capacity: int) -> FlatBuckets:
+        """
+        Returns a new table of capacity empty buckets.
+        """
+        return FlatBuckets(capacity)
+
+    def _cache_hashes(self, hashes):
+        """
+        Returns an array of hashes in the form this map caches them.
+        """
+        return hashes & _HASH_MASK
+
+    def _fill(self, slots: list, keys: list, values: list, hashes: list) -> None:
+        """
+        Stores each key/value pair and its hash in the matching bucket of
+        slots, which must all be empty.
+        """
+        buckets = self._buckets
+        for index, key, value, hash in zip(slots, keys, values, hashes):
+            buckets.hashes[index] = hash
+            buckets.keys[index] = key
+            buckets.values[index] = value
+            buckets.states[index] = _LIVE
+
+    def _find_slot(self, buckets: FlatBuckets, key: str, hash: int) -> (int, int, bool):
+        """
+        Walks the probe sequence for key through buckets exactly once,
+        starting from the given hash of the key.
+        Returns a tuple of the index where the probe stopped, the index
+        of the first tombstone passed along the way (-1 if none), and
+        whether the key was found at the returned index.
+        """
+        hash &= _HASH_MASK
+        states, hashes, keys = buckets.states, buckets.hashes, buckets.keys
+        capacity = len(states)
+        index = hash % capacity
+        first_tombstone = -1
+        step = self._first_step(key, capacity)
+        growth = self._probe_growth
+
+        j = 0  # number of probes so far
+        while j < capacity:
+            state = states[index]
+            if state == _EMPTY:
+                return index, first_tombstone, False
+            if state == _TOMBSTONE:
+                if first_tombstone == -1:
+                    first_tombstone = index
+            # compare cached hashes first; keys only when they match
+            elif hashes[index] == hash and keys[index] == key:
+                return index, first_tombstone, True
+            j += 1
+            index = (index + step) % capacity
+            step += growth
+
+        return index, first_tombstone, False
+
+    def _migrate_buckets(self, count: int) -> None:
+        """
+        Moves the live entries of up to count old buckets into the new
+        table while a resize is in progress, and drops the old table once
+        nothing is left in it.
+        """
+        old_buckets = self._old_buckets
+        old_states = old_buckets.states
+        old_capacity = old_buckets.length()
+        buckets = self._buckets
+        stop = min(self._rehash_index + count, old_capacity)
+        for i in range(self._rehash_index, stop):
+            if old_states[i] != _LIVE:
+                continue
+
+            # keys are unique across both tables, so just take the first free
+            # slot; the cached hash means the hash function isn't called again
+            hash = old_buckets.hashes[i]
+            key = old_buckets.keys[i]
+            index, first_tombstone, _ = self._find_slot(buckets, key, hash)
+            if first_tombstone != -1:
+                index = first_tombstone
+                self._tombstones -= 1
+            buckets.hashes[index] = hash
+            buckets.keys[index] = key
+            buckets.values[index] = old_buckets.values[i]
+            buckets.states[index] = _LIVE
+
+            # leave a tombstone behind so probes for other old keys still pass
+            old_states[i] = _TOMBSTONE
+            old_buckets.keys[i] = None
+            old_buckets.values[i] = None
+            self._old_size -= 1
+
+        self._rehash_index = stop
+        if stop == old_capacity or self._old_size == 0:
+            self._old_buckets = None
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live entry into a new table of new_capacity buckets in
+        a single pass over the current one, straight into the first empty
+        bucket of its probe sequence.
+        """
+        old_buckets = self._buckets
+        old_states, old_hashes = old_buckets.states, old_buckets.hashes
+        old_keys, old_values = old_buckets.keys, old_buckets.values
+        buckets = self._new_buckets(new_capacity)
+        states, hashes, keys, values = buckets.states, buckets.hashes, buckets.keys, buckets.values
+        first_step = self._first_step
+        growth = self._probe_growth
+        for i in range(old_buckets.length()):
+            if old_states[i] != _LIVE:
+                continue
+
+            hash = old_hashes[i]
+            key = old_keys[i]
+            index = hash % new_capacity
+            step = first_step(key, new_capacity)
+            while states[index] != _EMPTY:
+                index = (index + step) % new_capacity
+                step += growth
+            hashes[index] = hash
+            keys[index] = key
+            values[index] = old_values[i]
+            states[index] = _LIVE
+
+        self._buckets = buckets
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._modifications += 1
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, given the key's hash.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        self._grow_if_needed()
+
+        buckets = self._buckets
+        hash &= _HASH_MASK
+        index, first_tombstone, found = self._find_slot(buckets, key, hash)
+
+        # if key already in hash map, update the value in place
+        if found is True:
+            buckets.values[index] = value
+            return
+
+        # otherwise reuse the first tombstone on the probe path, if any
+        if first_tombstone != -1:
+            index = first_tombstone
+            self._tombstones -= 1
+
+        buckets.hashes[index] = hash
+        buckets.keys[index] = key
+        buckets.values[index] = value
+        buckets.states[index] = _LIVE
+
+        # a key still waiting in the old table is dropped from there
+        if self._old_buckets is not None:
+            old_buckets = self._old_buckets
+            old_index, _, found = self._find_slot(old_buckets, key, hash)
+            if found is True:
+                old_buckets.states[old_index] = _TOMBSTONE
+                old_buckets.keys[old_index] = None
+                old_buckets.values[old_index] = None
+                self._old_size -= 1
+                return
+
+        self._size += 1
+        self._modifications += 1
+
+    def _get(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, given the key's
+        hash, or default if the key isn't in the hash map.
+        """
+        if self._size == 0:
+            return default
+
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+        buckets, index = self._locate(key, hash)
+        if buckets is None:
+            return default
+
+        return buckets.values[index]
+
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key and its associated value from the hash map,
+        given the key's hash. Returns whether the key was found.
+        """
+        if self._size == 0:
+            return False
+
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+
+        buckets, index = self._locate(key, hash)
+        if buckets is None:
+            return False
+
+        buckets.states[index] = _TOMBSTONE
+        buckets.keys[index] = None
+        buckets.values[index] = None
+        self._size -= 1
+        self._modifications += 1
+        if buckets is self._buckets:
+            self._tombstones += 1
+        else:
+            self._old_size -= 1
+        return True
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a
+        key/value pair stored in the hash map.
+        """
+        new_arr = DynamicArray()
+        for buckets, start in ((self._buckets, 0), (self._old_buckets, self._rehash_index)):
+            if buckets is None:
+                continue
+            states, keys, values = buckets.states, buckets.keys, buckets.values
+            for i in range(start, buckets.length()):
+                if states[i] == _LIVE:
+                    new_arr.append((keys[i], values[i]))
+
+        return new_arr
+
+    def _dump_buckets(self) -> (bytearray, array, list, list):
+        """
+        Returns the state of every bucket and, for live buckets, the cached
+        hash, key and value (0 and None for the other buckets).
+        """
+        buckets = self._buckets
+        return buckets.states, buckets.hashes, buckets.keys, buckets.values
+
+    def _load_buckets(self, states: bytes, hashes, keys: list, values: list) -> bool:
+        """
+        Replaces the empty table with the output of _dump_buckets. Returns
+        whether it could use the hashes as they are; hashes that don't fit
+        in 64 bits (pickled by dump) have to be recomputed.
+        """
+        if not isinstance(hashes, array):
+            return False
+
+        buckets = self._buckets
+        buckets.states = bytearray(states)
+        buckets.hashes = hashes
+        buckets.keys = keys
+        buckets.values = values
+        return True
+
+    def _live_items(self, buckets: FlatBuckets, start: int = 0, stop: int = None):
+        """
+        Lazily yields the (key, value) pair of every live entry in buckets,
+        or only in buckets start up to stop.
+        """
+        states, keys, values = buckets.states, buckets.keys, buckets.values
+        stop = buckets.length() if stop is None else min(stop, buckets.length())
+        for i in range(start, stop):
+            if states[i] == _LIVE:
+                yield keys[i], values[i]
+
+
+class RobinHoodHashMap(HashMap):
+    """
+    Open addressing HashMap using Robin Hood hashing: linear probing where
+    an insert takes over the bucket of any entry that sits closer to its
+    own initial bucket than the new entry is to its own, and goes on to
+    insert the entry it displaced instead. Every probe sequence stays
+    short, so the table can run up to max_load (0.9 by default) rather
+    than 0.5, and a lookup stops as soon as it passes an entry closer to
+    home than the key would be. A remove shifts the entries after it back
+    one bucket instead of leaving a tombstone, so there are no tombstones
+    and no need to compact.
+    """
+
+    def __init__(self, capacity: int, function, rehash_step: int = None,
+                 max_load: float = 0.9, power_of_two: bool = False) -> None:
+        """
+        Initialize new HashMap that uses Robin Hood hashing for collision
+        resolution. The table doubles before its load factor would go
+        above max_load. Resizes are always done in one pass.
+        power_of_two works as for HashMap.
+        """
+        if rehash_step is not None:
+            raise ValueError("RobinHoodHashMap doesn't support incremental resizes")
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+
+        self._max_load = max_load
+        super().__init__(capacity, function, power_of_two=power_of_two)
+        self._probing = 'robin_hood'
+
+    @classmethod
+    def from_arrays(cls, keys, values, function: callable = hash_function_int,
+                    capacity: int = 11, rehash_step: int = None,
+                    power_of_two: bool = False) -> "RobinHoodHashMap":
+        """
+        Builds a hash map from a NumPy array (or sequence) of keys and a
+        matching sequence of values, as if each pair had been put in order
+        into RobinHoodHashMap(capacity, function, power_of_two=power_of_two).
+        Keys are hashed in one array operation if function has a "vectorized"
+        version, but every key is then inserted with the usual Robin Hood
+        probing.
+        """
+        if np is None:
+            raise ImportError("HashMap.from_arrays requires NumPy")
+
+        keys = np.asarray(keys)
+        values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        if keys.ndim != 1 or len(keys) != len(values):
+            raise ValueError("keys and values must be one-dimensional and of the same length")
+
+        map = cls(capacity, function, rehash_step, power_of_two=power_of_two)
+        key_list = keys.tolist()
+        function = map._hash_function
+        vectorized = getattr(function, 'vectorized', None)
+        if vectorized is not None and len(key_list) > 0:
+            hashes = vectorized(keys).tolist()
+        else:
+            hashes = [function(key) for key in key_list]
+
+        map._reserve(len(set(key_list)))
+        put = map._put
+        for key, hash, value in zip(key_list, hashes, values):
+            put(key, hash, value)
+        return map
+
+    @classmethod
+    def _for_load(cls, capacity: int, function, rehash_step: int, max_load: float,
+                  power_of_two: bool) -> "RobinHoodHashMap":
+        """
+        Returns the empty hash map load fills, given the settings of the
+        dumped map. Resizes are never incremental, so rehash_step is
+        ignored; max_load carries over from a dumped RobinHoodHashMap.
+        """
+        if max_load is None:
+            return cls(capacity, function, power_of_two=power_of_two)
+        return cls(capacity, function, max_load=max_load, power_of_two=power_of_two)
+
+    def _find_slot(self, buckets: DynamicArray, key: str, hash: int) -> (int, int, bool):
+        """
+        Walks the linear probe sequence for key through buckets, starting
+        from the given hash of the key, until it finds the key, an empty
+        bucket, or an entry closer to its initial bucket than the key would
+        be (which means the key isn't in the table).
+        Returns a tuple of the index where the probe stopped, -1 since
+        there are no tombstones, and whether the key was found at the
+        returned index.
+        """
+        capacity = buckets.length()
+        index = hash % capacity
+        distance = 0  # how far index is from the key's initial bucket
+
+        while distance < capacity:
+            bucket = buckets.get_at_index(index)
+            if bucket is None:
+                return index, -1, False
+            # compare cached hashes first; keys only when they match
+            if bucket.hash == hash and bucket.key == key:
+                return index, -1, True
+            if (index - bucket.hash) % capacity < distance:
+                return index, -1, False
+            index = (index + 1) % capacity
+            distance += 1
+
+        return index, -1, False
+
+    def _insert(self, entry: HashEntry) -> None:
+        """
+        Places entry, whose key isn't in the table, in the table: walks its
+        probe sequence and swaps it with the first entry that is closer to
+        its own initial bucket, carrying that entry on until an empty
+        bucket turns up.
+        """
+        buckets = self._buckets
+        capacity = buckets.length()
+        index = entry.hash % capacity
+        distance = 0
+
+        while True:
+            bucket = buckets.get_at_index(index)
+            if bucket is None:
+                buckets.set_at_index(index, entry)
+                return
+            bucket_distance = (index - bucket.hash) % capacity
+            if bucket_distance < distance:
+                buckets.set_at_index(index, entry)
+                entry = bucket
+                distance = bucket_distance
+            index = (index + 1) % capacity
+            distance += 1
+
+    def _migrate_buckets(self, count: int) -> None:
+        """
+        Moves every entry of the old table into the new table and drops
+        the old table. Resizes are never incremental, so count is ignored.
+        """
+        old_buckets = self._old_buckets
+        for i in range(old_buckets.length()):
+            entry = old_buckets.get_at_index(i)
+            if entry is not None:
+                # the cached hash means the hash function isn't called again
+                self._insert(entry)
+
+        self._old_buckets = None
+        self._old_size = 0
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Reinserts every entry into a new table of new_capacity buckets in
+        a single pass, with the usual Robin Hood swaps.
+        """
+        self._start_rehash(new_capacity)
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+    def _grow_if_needed(self) -> None:
+        """
+        Makes room for one more entry before an insert: doubles the table
+        if one more entry would take it above max_load.
+        """
+        if (self._size + 1) / self._capacity > self._max_load:
+            self.resize_table(self._capacity * 2)
+
+    def _grown_capacity(self, capacity: int, size: int) -> int:
+        """
+        Returns the capacity a table of the given prime capacity ends up at
+        if size new keys are put into it one at a time: it keeps doubling
+        while it would pass a load factor of max_load.
+        """
+        while size / capacity > self._max_load:
+            capacity = self._next_capacity(capacity * 2)
+        return capacity
+
+    def _reserved_capacity(self, count: int) -> int:
+        """
+        Returns the capacity _reserve(count) would resize the table to, or
+        None if it wouldn't: the capacity putting count new keys one at a
+        time would double the table to.
+        """
+        size = self._size + count
+        if size <= self._max_load * self._capacity:
+            return None
+        return self._grown_capacity(self._capacity, size)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, given the key's hash.
+        """
+        index, _, found = self._find_slot(self._buckets, key, hash)
+
+        # if key already in hash map, update the value in place
+        if found is True:
+            self._buckets.get_at_index(index).value = value
+            return
+
+        self._grow_if_needed()
+        self._insert(HashEntry(key, value, hash))
+        self._size += 1
+        self._modifications += 1
+
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key and its associated value from the hash map,
+        given the key's hash, shifting the entries after it back one bucket
+        until one is in its initial bucket or a bucket is empty.
+        Returns whether the key was found.
+        """
+        if self._size == 0:
+            return False
+
+        buckets = self._buckets
+        index, _, found = self._find_slot(buckets, key, hash)
+        if found is False:
+            return False
+
+        capacity = buckets.length()
+        next_index = (index + 1) % capacity
+        entry = buckets.get_at_index(next_index)
+        while entry is not None and entry.hash % capacity != next_index:
+            buckets.set_at_index(index, entry)
+            index = next_index
+            next_index = (index + 1) % capacity
+            entry = buckets.get_at_index(next_index)
+        buckets.set_at_index(index, None)
+
+        self._size -= 1
+        self._modifications += 1
+        return True
+
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -464,3 +1685,112 @@ if __name__ == "__main__":
     m.remove('1')
     m.resize_table(12)
     print(m.get_keys_and_values())
+
+    print("\nFlatHashMap compared with dict")
+    print("------------------------------")
+    for rehash_step in (None, 3):
+        m = FlatHashMap(11, hash_function_2, rehash_step)
+        expected = {}
+        for i in range(3000):
+            key = str(i * 7919 % 1000)
+            if i % 3 == 2:
+                m.remove(key)
+                expected.pop(key, None)
+            else:
+                m.put(key, i)
+                expected[key] = i
+        result = dict(m.items()) == expected
+        m.compact()
+        m.resize_table(4 * m.get_size())
+        result &= dict(m.items()) == expected and len(m) == len(expected)
+        result &= all(m.get(key) == value for key, value in expected.items())
+        result &= not m.contains_key('1000')
+        print(rehash_step, result, m.get_size(), m.get_capacity(), m.get_tombstones())
+
+    print("\nprobe sequences compared with dict")
+    print("----------------------------------")
+    for probing in ('linear', 'quadratic', 'triangular', 'double'):
+        for cls in (HashMap, FlatHashMap):
+            m = cls(11, hash_function_1, probing=probing)
+            expected = {}
+            for i in range(3000):
+                key = str(i * 7919 % 1000)
+                if i % 3 == 2:
+                    m.remove(key)
+                    expected.pop(key, None)
+                else:
+                    m.put(key, i)
+                    expected[key] = i
+            m.resize_table(3 * m.get_size())
+            result = dict(m.items()) == expected and len(m) == len(expected)
+            result &= all(m.get(key) == value for key, value in expected.items())
+            result &= not m.contains_key('1000')
+
+            # a dump loads into the same probe sequence
+            file = io.BytesIO()
+            m.dump(file)
+            file.seek(0)
+            result &= dict(cls.load(file, hash_function_1).items()) == expected
+            print(probing, cls.__name__, result, m.get_size(), m.get_capacity())
+
+    print("\nRobinHoodHashMap compared with dict")
+    print("-----------------------------------")
+    m = RobinHoodHashMap(11, hash_function_2, max_load=0.8)
+    expected = {}
+    for i in range(3000):
+        key = str(i * 7919 % 1000)
+        if i % 3 == 2:
+            m.remove(key)
+            expected.pop(key, None)
+        else:
+            m.put(key, i)
+            expected[key] = i
+    m.resize_table(2 * m.get_size())
+    result = dict(m.items()) == expected and len(m) == len(expected)
+    result &= all(m.get(key) == value for key, value in expected.items())
+    result &= not m.contains_key('1000')
+    print(result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    file = io.BytesIO()
+    m.dump(file)
+    file.seek(0)
+    loaded = RobinHoodHashMap.load(file, hash_function_2)
+    print(dict(loaded.items()) == expected, loaded.get_capacity() == m.get_capacity(),
+          loaded._max_load)
+
+    # a dump of an incrementally resizing HashMap loads too
+    m = HashMap(11, hash_function_2, rehash_step=4)
+    m.put_many((str(i), i) for i in range(500))
+    file = io.BytesIO()
+    m.dump(file)
+    file.seek(0)
+    loaded = RobinHoodHashMap.load(file, hash_function_2)
+    print(dict(loaded.items()) == dict(m.items()), loaded.get_size())
+
+    print("\nsnapshot at capacity 2")
+    print("----------------------")
+    # a capacity the constructor would round up (2 -> 3) is restored as is
+    for cls in (HashMap, FlatHashMap, RobinHoodHashMap):
+        m = cls(11, hash_function_1)
+        m.put('b', 1)
+        m.resize_table(2)
+        file = io.BytesIO()
+        m.dump(file)
+        file.seek(0)
+        loaded = cls.load(file, hash_function_1)
+        result = loaded.get('b') == 1 and len(loaded) == 1
+        loaded.put('c', 2)
+        loaded.put('d', 3)
+        result &= dict(loaded.items()) == {'b': 1, 'c': 2, 'd': 3}
+        print(cls.__name__, m.get_capacity(), result, loaded.get_capacity())
+
+    if np is not None:
+        print("\nfrom_arrays with double hashing")
+        print("-------------------------------")
+        # integer keys need an integer-safe step function, derived by default
+        keys = np.arange(0, 5000 * 1024, 1024)
+        for power_of_two in (False, True):
+            m = HashMap.from_arrays(keys, (keys * 2).tolist(), probing='double', power_of_two=power_of_two)
+            result = dict(m.items()) == {key: key * 2 for key in keys.tolist()}
+            result &= all(m.get(key) == key * 2 for key in keys.tolist()) and m.get(7) is None
+            print(power_of_two, result, m.get_size(), m.get_capacity())
@@ -8,31 +8,95 @@
 # is_prime, next_prime, get_size, get_capacity, put, get, remove,
 # contains_key, clear, empty_buckets, resize_table, table_load,
 # and get_keys_and_values.  The program also includes a standalone
-# function, find_mode.
+# function, find_mode, and the streaming counters it is built on,
+# ModeCounter and TopKCounter, plus find_mode_parallel, which counts
+# chunks of the input in a process pool and merges the partial maps.
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+import heapq
+import io
+import itertools
+import operator
+import os
+import pickle
+import struct
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from include import (DynamicArray, LinkedList, SLNode, as_list, dump_hashes,
+                     hash_function_1, hash_function_2, load_hashes,
+                     is_prime, mixed_hash_function, next_power_of_two, next_prime)
+
+
+# Returned by _get for missing keys, since None is a valid value
+_MISSING = object()
+
+# Start of a dump: magic number and format version
+_DUMP_HEADER = struct.Struct('<4sH')
+_DUMP_MAGIC = b'HMSC'
+_DUMP_VERSION = 2
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 max_load: float = None,
+                 min_load: float = None,
+                 rehash_step: int = None,
+                 power_of_two: bool = False,
+                 free_list: int = 0) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        separate chaining for collision resolution.
+        If max_load is given, the table grows once its load factor goes
+        above it; if min_load is given, the table shrinks (never below
+        the initial capacity) once its load factor drops below it.
+        If rehash_step is given, resizes are incremental: the old table is
+        kept next to the new one and every put, get, contains_key and
+        remove moves rehash_step old buckets over.
+        If power_of_two is true, capacities are powers of two instead of
+        primes, so resizes skip the prime search, and the hashes are mixed
+        by mixed_hash_function so their low bits alone pick good buckets.
+        If free_list is given, up to that many removed nodes are kept and
+        reused by later puts instead of allocating new ones.
         """
-        self._buckets = DynamicArray()
+        if max_load is not None and max_load <= 0:
+            raise ValueError("max_load must be positive")
+        if min_load is not None and min_load < 0:
+            raise ValueError("min_load must not be negative")
+        # halving the table doubles its load, so keep the watermarks far
+        # enough apart that a shrink can't immediately trigger a grow
+        if max_load is not None and min_load is not None and min_load * 2 >= max_load:
+            raise ValueError("min_load must be less than half of max_load")
+        if rehash_step is not None and rehash_step < 1:
+            raise ValueError("rehash_step must be at least 1")
+        if free_list < 0:
+            raise ValueError("free_list must not be negative")
+
+        # capacity must be a prime number (a power of two in power of two mode)
+        self._power_of_two = power_of_two
+        self._capacity = self._next_capacity(capacity)
+        self._buckets = self._new_buckets(self._capacity)
+
+        self._hash_function = mixed_hash_function(function) if power_of_two else function
+        self._size = 0
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        self._max_load = max_load
+        self._min_load = min_load
+        self._min_capacity = self._capacity
 
-        self._hash_function = function
-        self._size = 0
+        # incremental resize state
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._rehash_index = 0
+
+        # removed nodes waiting to be reused by _put
+        self._free_list = free_list
+        self._free_nodes = []
+
+        # bumped by every change that adds, removes or moves entries, so
+        # iterators can tell the map changed under them
+        self._modifications = 0
 
     def __str__(self) -> str:
         """
@@ -77,6 +141,15 @@ class HashMap:
 
         return True
 
+    def _next_capacity(self, capacity: int) -> int:
+        """
+        Returns the smallest capacity the table can have that is at least
+        capacity: the next prime, or in power of two mode the next power of two.
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        return next_prime(capacity)
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -93,28 +166,163 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns a new table of capacity empty buckets.
+        """
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(LinkedList())
+        return buckets
+
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        Returns the old bucket a key with the given hash would still be in
+        during an incremental resize, or None if there's no resize in
+        progress or that bucket has already been moved over.
+        """
+        if self._old_buckets is None:
+            return None
+
+        index = hash % self._old_buckets.length()
+        if index < self._rehash_index:
+            return None
+
+        return self._old_buckets.get_at_index(index)
+
+    def _migrate_buckets(self, count: int) -> None:
+        """
+        Moves the nodes of up to count old buckets into the new table while
+        an incremental resize is in progress, and drops the old table once
+        every bucket has been moved.
+        """
+        old_buckets = self._old_buckets
+        old_capacity = old_buckets.length()
+        stop = min(self._rehash_index + count, old_capacity)
+        for i in range(self._rehash_index, stop):
+            self._relink(old_buckets.get_at_index(i))
+            old_buckets.set_at_index(i, None)
+
+        self._rehash_index = stop
+        if stop == old_capacity:
+            self._old_buckets = None
+
+    def _relink(self, list: LinkedList) -> None:
+        """
+        Moves every node of list, which must not be one of the current
+        table's buckets, into its bucket in the current table. The nodes
+        are relinked from their cached hashes rather than copied.
+        """
+        buckets = self._buckets
+        capacity = self._capacity
+        # the iterator has already stepped past a node by the time it's
+        # relinked, so changing its next link doesn't cut the walk short
+        for node in list:
+            buckets.get_at_index(node.hash % capacity).insert_node(node)
+
+    def _reserve(self, count: int) -> None:
+        """
+        Grows the table once, if needed, so count more entries fit under the
+        high watermark without another resize along the way.
+        """
+        new_capacity = self._reserved_capacity(count)
+        if new_capacity is not None:
+            self.resize_table(new_capacity)
+
+    def _reserved_capacity(self, count: int) -> int:
+        """
+        Returns the capacity _reserve(count) would resize the table to, or
+        None if it wouldn't. The table at least doubles, so reserving room
+        batch by batch doesn't resize on every batch.
+        """
+        if self._max_load is None:
+            return None
+
+        needed = int((self._size + count) / self._max_load) + 1
+        if needed <= self._capacity:
+            return None
+        return max(needed, self._capacity * 2)
+
+    def _count_new_keys(self, keys: list, hashes: list) -> int:
+        """
+        Returns how many distinct keys in keys, given their hashes, aren't
+        in the hash map yet, i.e. how many entries putting them all adds.
+        """
+        distinct = dict(zip(keys, hashes))
+        if self._size == 0:
+            return len(distinct)
+        get = self._get
+        return sum(1 for key, hash in distinct.items() if get(key, hash, _MISSING) is _MISSING)
+
+    def _shrink_if_needed(self) -> None:
+        """
+        Shrinks the table (never below the initial capacity) once its load
+        factor drops below the low watermark.
+        """
+        if self._min_load is None:
+            return
+
+        new_capacity = self._capacity
+        while new_capacity > self._min_capacity and self._size / new_capacity < self._min_load:
+            new_capacity = max(new_capacity // 2, self._min_capacity)
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
     def put(self, key: str, value: object) -> None:
         """
         Updates the key/value pair in the hash map.
         """
+        self._put(key, self._hash_function(key), value)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, given the key's hash.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+
         # find array index
-        hash = self._hash_function(key)
         index = hash % self._buckets.length()
 
-        # if key already in hash map, remove
+        # if key already in hash map, update its value in place
         list = self._buckets.get_at_index(index)
-        if list.contains(key):
-            list.remove(key)
+        node = list.contains(key, hash)
+        if node is not None:
+            node.value = value
+            return
+
+        # the key may still be waiting in the old table during a resize
+        old_list = self._old_bucket(hash)
+        if old_list is not None and old_list.remove(key, hash):
             self._size -= 1
 
-        # insert key/value pair
-        list.insert(key, value)
+        # insert key/value pair, caching its hash for lookups and resizes,
+        # in a recycled node if there is one
+        free_nodes = self._free_nodes
+        if free_nodes:
+            node = free_nodes.pop()
+            node.key = key
+            node.value = value
+            node.hash = hash
+            list.insert_node(node)
+        else:
+            list.insert(key, value, hash)
         self._size += 1
+        self._modifications += 1
+
+        # grow the table once it passes the high watermark
+        if self._max_load is not None and self.table_load() > self._max_load:
+            self.resize_table(self._capacity * 2)
 
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the hash table.
+        Finishes any incremental resize in progress first.
         """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
         capacity = self.get_capacity()
         empty = 0
         for i in range(capacity):
@@ -137,52 +345,129 @@ class HashMap:
         """
         Clears the contents of the hash map without changing the underlying table capacity.
         """
-        self._buckets = DynamicArray()
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        self._buckets = self._new_buckets(self._capacity)
         self._size = 0
+        self._modifications += 1
+
+        self._old_buckets = None
+        self._rehash_index = 0
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        Changes the capacity of the internal hash table.
+        Changes the capacity of the internal hash table. In incremental
+        mode the rehash is spread over the following operations instead
+        of done all at once.
+        """
+        new_capacity = self._target_capacity(new_capacity)
+        if new_capacity is None:
+            return
+
+        if self._rehash_step is not None:
+            self._start_rehash(new_capacity)
+            return
+
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+        self._modifications += 1
+
+        # keep the existing buckets and swap in a new empty table
+        old_buckets = self._buckets
+        self._capacity = new_capacity
+        self._buckets = self._new_buckets(new_capacity)
+
+        # walk the old table once, relinking its nodes into the new table
+        # from their cached hashes; the keys are already unique, so they go
+        # straight into the buckets instead of through put, which would also
+        # look for duplicates and could trigger another resize
+        for i in range(old_buckets.length()):
+            self._relink(old_buckets.get_at_index(i))
+
+    def _target_capacity(self, new_capacity: int) -> int:
+        """
+        Returns the capacity resize_table(new_capacity) gives the table,
+        or None if it leaves the table alone.
         """
         # if new capacity is less than 1, do nothing
         if new_capacity < 1:
-            return
+            return None
+
+        # round new capacity up to the next prime (or power of two) unless it is one
+        if self._power_of_two or is_prime(new_capacity) is False:
+            new_capacity = self._next_capacity(new_capacity)
+        return new_capacity
+
+    def _start_rehash(self, new_capacity: int, buckets: DynamicArray = None) -> None:
+        """
+        Sets the current table aside as the old table and starts over with
+        buckets, by default a new empty table of new_capacity buckets,
+        finishing any resize that is still in progress first.
+        _migrate_buckets moves the nodes over.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
 
-        # check that new capacity is prime; if it isn't, change to next highest prime
-        if self._is_prime(new_capacity) is False:
-            new_capacity = self._next_prime(new_capacity)
+        self._old_buckets = self._buckets
+        self._rehash_index = 0
 
-        # store existing key/value pairs, update capacity, and clear hash table
-        elements = self.get_keys_and_values()
         self._capacity = new_capacity
-        self.clear()
+        self._buckets = self._new_buckets(new_capacity) if buckets is None else buckets
+        self._modifications += 1
 
-        # rehash existing key/value pairs into newly cleared table
-        size = elements.length()
-        for i in range(size):
-            key, value = elements.get_at_index(i)
-            self.put(key, value)
+        if self._size == 0:
+            self._old_buckets = None
 
     def get(self, key: str) -> object:
         """
         Returns the value associated with the given key.
         """
+        return self._get(key, self._hash_function(key))
+
+    def _get(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, given the key's
+        hash, or default if the key isn't in the hash map.
+        """
         # if key isn't in hash table, do nothing
-        if self.contains_key(key) is False:
-            return None
+        if self._size == 0:
+            return default
 
-        # find linked list stored at the array index
-        hash = self._hash_function(key)
-        index = hash % self._buckets.length()
-        list = self._buckets.get_at_index(index)
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
 
         # find the node in the linked list with the matching key and return its value
-        node = list.contains(key)
-        node_value = node.value
+        node = self._find_node(key, hash)
+        if node is None:
+            return default
+
+        return node.value
+
+    def _find_node(self, key: str, hash: int) -> SLNode:
+        """
+        Returns the node holding key, given the key's hash, looking in the
+        old table too during an incremental resize; None if it's missing.
+        """
+        node = self._buckets.get_at_index(hash % self._buckets.length()).contains(key, hash)
+        if node is None:
+            old_list = self._old_bucket(hash)
+            if old_list is not None:
+                node = old_list.contains(key, hash)
+        return node
+
+    def _increment(self, key: str, hash: int, amount: int = 1) -> int:
+        """
+        Adds amount to the count stored for key, given the key's hash,
+        starting from 0 if the key is missing. Returns the new count.
+        """
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+
+        node = self._find_node(key, hash)
+        if node is None:
+            self._put(key, hash, amount)
+            return amount
 
-        return node_value
+        node.value += amount
+        return node.value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -192,13 +477,21 @@ class HashMap:
         if self._size == 0:
             return False
 
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+
         # find array index where key would be stored
         hash = self._hash_function(key)
         index = hash % self._buckets.length()
 
         # if key is in the linked list, return True; else return False
         list = self._buckets.get_at_index(index)
-        if list.contains(key):
+        if list.contains(key, hash):
+            return True
+
+        # otherwise check the old table during an incremental resize
+        old_list = self._old_bucket(hash)
+        if old_list is not None and old_list.contains(key, hash):
             return True
 
         return False
@@ -207,15 +500,40 @@ class HashMap:
         """
         Removes the given key and its associated value from the hash map.
         """
-        # if key is in the hash table, find the array index
-        if self.contains_key(key) is True:
-            hash = self._hash_function(key)
-            index = hash % self._buckets.length()
-            list = self._buckets.get_at_index(index)
+        if self._remove(key, self._hash_function(key)):
+            self._shrink_if_needed()
 
-            # remove the key from the linked list and decrement hash table size
-            list.remove(key)
-            self._size -= 1
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key and its associated value from the hash map,
+        given the key's hash, without shrinking the table.
+        Returns whether the key was found.
+        """
+        if self._size == 0:
+            return False
+
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._rehash_step)
+
+        # remove the key from its linked list (or the old table's during an
+        # incremental resize) and decrement hash table size
+        list = self._buckets.get_at_index(hash % self._buckets.length())
+        node = list.remove_node(key, hash)
+        if node is None:
+            old_list = self._old_bucket(hash)
+            if old_list is not None:
+                node = old_list.remove_node(key, hash)
+        if node is None:
+            return False
+
+        # keep the node for reuse, minus its references to the key and value
+        if len(self._free_nodes) < self._free_list:
+            node.key = node.value = node.next = None
+            self._free_nodes.append(node)
+
+        self._size -= 1
+        self._modifications += 1
+        return True
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -234,52 +552,443 @@ class HashMap:
                 value = element.value
                 new_arr.append((key, value))
 
+        # include entries an incremental resize hasn't moved over yet
+        if self._old_buckets is not None:
+            for i in range(self._rehash_index, self._old_buckets.length()):
+                for element in self._old_buckets.get_at_index(i):
+                    new_arr.append((element.key, element.value))
+
         return new_arr
 
-def find_mode(da: DynamicArray) -> (DynamicArray, int):
+    def put_many(self, pairs) -> None:
+        """
+        Updates every key/value pair in pairs, which may be a DynamicArray
+        or any iterable of (key, value) tuples. A growing table is resized
+        at most once up front, and all keys are hashed in one pass.
+        """
+        pairs = as_list(pairs)
+        hashes = list(map(self._hash_function, [key for key, _ in pairs]))
+        self._reserve(self._count_new_keys([key for key, _ in pairs], hashes))
+
+        put = self._put
+        for (key, value), hash in zip(pairs, hashes):
+            put(key, hash, value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value associated with each key
+        in keys (None for missing keys), in the same order. keys may be a
+        DynamicArray or any iterable.
+        """
+        keys = as_list(keys)
+        get = self._get
+        return DynamicArray([get(key, hash) for key, hash in zip(keys, map(self._hash_function, keys))])
+
+    def remove_many(self, keys) -> int:
+        """
+        Removes every key in keys, which may be a DynamicArray or any
+        iterable, and returns how many of them were in the hash map.
+        A shrinking table is resized at most once, at the end.
+        """
+        keys = as_list(keys)
+        remove = self._remove
+        removed = 0
+        for key, hash in zip(keys, map(self._hash_function, keys)):
+            if remove(key, hash):
+                removed += 1
+
+        self._shrink_if_needed()
+        return removed
+
+    def merge(self, other, combine: callable = None) -> None:
+        """
+        Updates the hash map with every key/value pair of other, which may be
+        another HashMap (from either module, or built in another process),
+        any mapping, or an iterable of (key, value) pairs. If combine is given,
+        a key already in the hash map gets combine(current value, other's value)
+        instead of other's value, e.g. operator.add to merge partial counts.
+        Keys are rehashed with this hash map's function, since cached hashes
+        may come from another process.
+        """
+        if hasattr(other, 'items'):
+            other = other.items()
+
+        # not reserved up front: partial maps usually share most of their keys
+        get, put = self._get, self._put
+        for key, value in other:
+            hash = self._hash_function(key)
+            if combine is not None:
+                current = get(key, hash, _MISSING)
+                if current is not _MISSING:
+                    value = combine(current, value)
+            put(key, hash, value)
+
+    # -------------------------- Snapshots --------------------------- #
+
+    def dump(self, file) -> None:
+        """
+        Writes the hash map to the binary file object file: its settings,
+        then the cached hash of every node, bucket by bucket in chain order,
+        and the pickled keys and values, so load can restore the exact same
+        table without calling the hash function.
+        """
+        # settle any incremental resize so there's a single table to write
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+        hashes, keys, values = [], [], []
+        for i in range(self._capacity):
+            for node in self._buckets.get_at_index(i):
+                hashes.append(node.hash)
+                keys.append(node.key)
+                values.append(node.value)
+
+        file.write(_DUMP_HEADER.pack(_DUMP_MAGIC, _DUMP_VERSION))
+        pickle.dump((self._capacity, self._max_load, self._min_load, self._min_capacity,
+                     self._rehash_step, self._power_of_two),
+                    file, pickle.HIGHEST_PROTOCOL)
+        dump_hashes(file, hashes)
+        pickle.dump(keys, file, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(values, file, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file, function: callable = hash_function_1) -> "HashMap":
+        """
+        Returns a hash map read from the binary file object file, as written
+        by dump. function must be the hash function the map was dumped with.
+        A few keys are hashed again to check; if they don't match (say, the
+        function is randomized per process), the map is rebuilt by putting
+        every key instead.
+        """
+        header = file.read(_DUMP_HEADER.size)
+        if len(header) != _DUMP_HEADER.size or header[:4] != _DUMP_MAGIC:
+            raise ValueError("not a dump of an SC HashMap")
+        _, version = _DUMP_HEADER.unpack(header)
+        if version != _DUMP_VERSION:
+            raise ValueError(f"unsupported dump version {version}")
+
+        capacity, max_load, min_load, min_capacity, rehash_step, power_of_two = pickle.load(file)
+        hashes = load_hashes(file)
+        keys = pickle.load(file)
+        values = pickle.load(file)
+
+        map = cls(capacity, function, max_load, min_load, rehash_step, power_of_two)
+        map._min_capacity = min_capacity
+        # the constructor rounds capacity up (2 becomes 3), but the dumped
+        # layout needs the exact capacity it was dumped at
+        map._capacity = capacity
+        map._buckets = map._new_buckets(capacity)
+        if not all(map._hash_function(keys[i]) == hashes[i] for i in range(min(8, len(keys)))):
+            map.put_many(zip(keys, values))
+            return map
+
+        # nodes are inserted at the head, so go backwards to keep chain order
+        buckets = map._buckets
+        for i in range(len(keys) - 1, -1, -1):
+            hash = hashes[i]
+            buckets.get_at_index(hash % capacity).insert(keys[i], values[i], hash)
+        map._size = len(keys)
+        return map
+
+    # ----------------------- Mapping protocol ----------------------- #
+
+    def __len__(self) -> int:
+        """Return size of map."""
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether key is in the map using the in operator."""
+        return self.contains_key(key)
+
+    def __getitem__(self, key: str) -> object:
+        """Return value of key using [] syntax; raises KeyError if it's missing."""
+        value = self._get(key, self._hash_function(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """Set value of key using [] syntax."""
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Remove key using del; raises KeyError if it's missing."""
+        if not self._remove(key, self._hash_function(key)):
+            raise KeyError(key)
+        self._shrink_if_needed()
+
+    def __iter__(self):
+        """Return an iterator over the keys in the map."""
+        return self.keys()
+
+    def _nodes(self):
+        """
+        Lazily yields every node in the map, walking the buckets directly.
+        Raises RuntimeError if entries are added, removed or moved while
+        iterating; updating the value of an existing key is fine.
+        """
+        # settle any incremental resize so lookups during iteration don't move nodes
+        if self._old_buckets is not None:
+            self._migrate_buckets(self._old_buckets.length())
+
+        modifications = self._modifications
+        buckets = self._buckets
+        for i in range(buckets.length()):
+            for node in buckets.get_at_index(i):
+                if self._modifications != modifications:
+                    raise RuntimeError("HashMap changed during iteration")
+                yield node
+
+        if self._modifications != modifications:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def _live_items(self, buckets: DynamicArray, start: int = 0, stop: int = None):
+        """
+        Lazily yields the (key, value) pair of every node in buckets, or
+        only in buckets start up to stop.
+        """
+        stop = buckets.length() if stop is None else min(stop, buckets.length())
+        for i in range(start, stop):
+            for node in buckets.get_at_index(i):
+                yield node.key, node.value
+
+    def keys(self):
+        """Return a lazy iterator over the keys in the map."""
+        return (node.key for node in self._nodes())
+
+    def values(self):
+        """Return a lazy iterator over the values in the map."""
+        return (node.value for node in self._nodes())
+
+    def items(self):
+        """Return a lazy iterator over the (key, value) pairs in the map."""
+        return ((node.key, node.value) for node in self._nodes())
+
+
+def _modes(counts: HashMap, max_freq: int, count=lambda value: value) -> DynamicArray:
+    """
+    Returns a dynamic array of the keys in counts whose count is max_freq,
+    in table order.
+    """
+    modes = DynamicArray()
+    if max_freq == 0:
+        return modes
+
+    pairs = counts.get_keys_and_values()
+    for i in range(pairs.length()):
+        key, value = pairs.get_at_index(i)
+        if count(value) == max_freq:
+            modes.append(key)
+    return modes
+
+
+class ModeCounter:
     """
-    Receives a dynamic array as input and returns a tuple containing a
-    dynamic array comprising the mode value(s) of the array and an integer
-    representing how many times the mode value(s) appear.
+    Counts how often each key appears in a stream, one element at a time,
+    keeping the mode frequency up to date as it goes so the mode can be
+    read at any point. Each element is hashed once.
     """
-    # if you'd like to use a hash map,
-    # use this instance of your Separate Chaining HashMap
-    map = HashMap()
-
-    #create mode array
-    mode_arr = DynamicArray()
-
-    # length of input array
-    length = da.length()
-
-    max_freq = 0
-
-    for i in range(length):
-        # if hash map contains key
-        key = da.get_at_index(i)
-        if map.contains_key(key):
-            # get value and increment frequency of that key
-            value = map.get(key)
-            key_freq = value + 1
-            # put key and its frequency in hash table
-            map.put(key, key_freq)
-        # else, add key to hash map with value of 1
+
+    def __init__(self, function: callable = hash_function_1) -> None:
+        """Initialize an empty counter that hashes keys with function."""
+        self._counts = HashMap(function=function, max_load=1.0)
+        self._max_freq = 0
+
+    def add(self, key: str) -> None:
+        """Count one occurrence of key."""
+        counts = self._counts
+        freq = counts._increment(key, counts._hash_function(key))
+        if freq > self._max_freq:
+            self._max_freq = freq
+
+    def update(self, items) -> None:
+        """
+        Count every element of items, which may be a DynamicArray or any
+        iterable; iterators such as file lines or generators are consumed lazily.
+        """
+        add = self.add
+        if isinstance(items, DynamicArray):
+            for i in range(items.length()):
+                add(items.get_at_index(i))
+        else:
+            for key in items:
+                add(key)
+
+    def get_mode(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a dynamic array of the mode value(s) seen so far
+        and how many times they appeared.
+        """
+        return _modes(self._counts, self._max_freq), self._max_freq
+
+    def get_counts(self) -> HashMap:
+        """Return the hash map of every key seen so far and its count."""
+        return self._counts
+
+
+class TopKCounter:
+    """
+    Finds the (approximately) k most frequent keys of a stream in bounded
+    memory using the Space-Saving algorithm: at most k keys are tracked, and
+    an untracked key replaces the tracked key with the lowest count,
+    inheriting that count. Reported counts never underestimate, and
+    overestimate by at most the inherited count (no more than n / k after
+    n elements). Any key appearing more than n / k times is always tracked.
+    """
+
+    def __init__(self, k: int, function: callable = hash_function_1) -> None:
+        """Initialize an empty counter tracking at most k keys hashed with function."""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        self._k = k
+        # key -> [count, error], where error is the count inherited on eviction
+        self._counts = HashMap(k, function)
+        # min-heap of (count, sequence, key); entries go stale as counts grow
+        # and are skipped when popped, and the heap is rebuilt once too large
+        self._heap = []
+        self._sequence = 0
+        self._max_freq = 0
+
+    def _push(self, key: str, count: int) -> None:
+        """Record key's new count in the heap."""
+        self._sequence += 1
+        heapq.heappush(self._heap, (count, self._sequence, key))
+        if len(self._heap) > 4 * self._k:
+            self._heap = [(entry[0], i, key) for i, (key, entry) in enumerate(self._counts.items())]
+            heapq.heapify(self._heap)
+            self._sequence = len(self._heap)
+
+    def _pop_min(self) -> (str, int):
+        """Remove and return the tracked key with the lowest count and that count."""
+        counts = self._counts
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            entry = counts.get(key)
+            if entry is not None and entry[0] == count:
+                return key, count
+
+    def add(self, key: str) -> None:
+        """Count one occurrence of key."""
+        counts = self._counts
+        hash = counts._hash_function(key)
+        entry = counts._get(key, hash)
+        if entry is not None:
+            entry[0] += 1
+        elif counts.get_size() < self._k:
+            entry = [1, 0]
+            counts._put(key, hash, entry)
+        else:
+            # replace the least frequent key, inheriting its count as error
+            evicted, count = self._pop_min()
+            counts.remove(evicted)
+            entry = [count + 1, count]
+            counts._put(key, hash, entry)
+
+        self._push(key, entry[0])
+        if entry[0] > self._max_freq:
+            self._max_freq = entry[0]
+
+    def update(self, items) -> None:
+        """
+        Count every element of items, which may be a DynamicArray or any
+        iterable; iterators such as file lines or generators are consumed lazily.
+        """
+        add = self.add
+        if isinstance(items, DynamicArray):
+            for i in range(items.length()):
+                add(items.get_at_index(i))
         else:
-            map.put(key, 1)
-            key_freq = 1
+            for key in items:
+                add(key)
+
+    def get_mode(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a dynamic array of the (estimated) mode value(s)
+        and their estimated frequency.
+        """
+        return _modes(self._counts, self._max_freq, lambda entry: entry[0]), self._max_freq
+
+    def get_top(self, n: int = None) -> DynamicArray:
+        """
+        Return a dynamic array of up to n (default k) tuples of a tracked
+        key, its estimated count and the most that count may overestimate
+        by, most frequent first.
+        """
+        top = sorted(((key, entry[0], entry[1]) for key, entry in self._counts.items()),
+                     key=lambda item: item[1], reverse=True)
+        return DynamicArray(top[:self._k if n is None else n])
+
+
+def find_mode(da: DynamicArray) -> (DynamicArray, int):
+    """
+    Receives a dynamic array (or any iterable, consumed in a single pass)
+    as input and returns a tuple containing a dynamic array comprising
+    the mode value(s) of the array and an integer representing how many
+    times the mode value(s) appear.
+    """
+    counter = ModeCounter()
+    counter.update(da)
+    return counter.get_mode()
+
+
+def _chunks(items, chunk_size: int):
+    """
+    Yields lists of up to chunk_size elements of items, which may be
+    a DynamicArray or any iterable.
+    """
+    if isinstance(items, DynamicArray):
+        data = items._data
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+        return
+
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
-        if key_freq > max_freq:
-            max_freq = key_freq
 
-    # build return array with the most occurring value(s) in array and the highest frequency
-    map_pairs = map.get_keys_and_values()
-    size = map.get_size()
-    for i in range(size):
-        key, value = map_pairs.get_at_index(i)
-        if value == max_freq:
-            mode_arr.append(key)
+def _count_chunk(keys: list, function: callable) -> list:
+    """
+    Returns a list of (key, count) pairs, one for each distinct key in keys.
+    Runs in a worker process. A flat list is sent back rather than the hash
+    map itself, whose bucket chains pickle recursively, one level per node.
+    """
+    counter = ModeCounter(function)
+    counter.update(keys)
+    return list(counter.get_counts().items())
+
+
+def find_mode_parallel(da, workers: int = None, chunk_size: int = 100000,
+                       function: callable = hash_function_1) -> (DynamicArray, int):
+    """
+    Same as find_mode, but splits da (a DynamicArray or any iterable) into
+    chunks of chunk_size elements that are counted in a pool of workers
+    processes (default: one per CPU). Each worker returns its partial counts
+    as (key, count) pairs, which are merged by adding counts. At most two
+    chunks per worker are in flight at a time, so iterators are read lazily.
+    function must be picklable, i.e. defined at module level.
+    """
+    workers = workers or os.cpu_count() or 1
+    counts = HashMap(function=function, max_load=1.0)
 
-    return mode_arr, max_freq
+    with ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        for chunk in _chunks(da, chunk_size):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    counts.merge(future.result(), operator.add)
+            pending.add(executor.submit(_count_chunk, chunk, function))
+
+        for future in pending:
+            counts.merge(future.result(), operator.add)
+
+    max_freq = max(counts.values(), default=0)
+    return _modes(counts, max_freq), max_freq
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -485,3 +1194,72 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nsnapshot round trip compared with dict")
+    print("--------------------------------------")
+    for rehash_step, power_of_two in ((None, False), (4, False), (None, True)):
+        m = HashMap(11, hash_function_2, max_load=1.0, min_load=0.25, rehash_step=rehash_step,
+                    power_of_two=power_of_two)
+        expected = {}
+        for i in range(3000):
+            key = str(i * 7919 % 1000)
+            if i % 3 == 2:
+                m.remove(key)
+                expected.pop(key, None)
+            else:
+                m.put(key, i)
+                expected[key] = i
+        file = io.BytesIO()
+        m.dump(file)
+        file.seek(0)
+        loaded = HashMap.load(file, hash_function_2)
+        result = dict(loaded.items()) == expected and len(loaded) == len(expected)
+        result &= loaded.get_capacity() == m.get_capacity()
+        # the loaded map keeps working: removals and resizes
+        loaded.remove_many(list(expected)[:100])
+        loaded.resize_table(loaded.get_size())
+        result &= dict(loaded.items()) == dict(list(expected.items())[100:])
+        print(rehash_step, power_of_two, result, loaded.get_size(), loaded.get_capacity())
+
+    # loaded with another hash function, the map is rebuilt rather than misread
+    file = io.BytesIO()
+    m.dump(file)
+    file.seek(0)
+    print(dict(HashMap.load(file, hash_function_1).items()) == expected)
+
+    # a capacity the constructor would round up (2 -> 3) is restored as is
+    m = HashMap(11, hash_function_1)
+    m.put_many((key, key.upper()) for key in 'abcde')
+    m.resize_table(2)
+    file = io.BytesIO()
+    m.dump(file)
+    file.seek(0)
+    loaded = HashMap.load(file, hash_function_1)
+    print(loaded.get_capacity(), dict(loaded.items()) == dict(m.items()),
+          all(loaded.get(key) == key.upper() for key in 'abcde'))
+
+    print("\nfree list compared with dict")
+    print("----------------------------")
+    m = HashMap(11, hash_function_2, max_load=1.0, min_load=0.25, free_list=64)
+    expected = {}
+    for i in range(3000):
+        key = str(i * 7919 % 1000)
+        if i % 3 == 2:
+            m.remove(key)
+            expected.pop(key, None)
+        else:
+            m.put(key, i)
+            expected[key] = i
+    # up to 64 removed nodes are kept, holding no keys or values...
+    removed = list(expected)[:100]
+    m.remove_many(removed)
+    result = len(m._free_nodes) == 64
+    result &= all(node.key is None and node.value is None for node in m._free_nodes)
+    # ...and put back into use by the next puts
+    m.put_many((key, expected[key]) for key in removed)
+    result &= len(m._free_nodes) == 0
+    m.resize_table(2 * m.get_size())
+    result &= dict(m.items()) == expected and len(m) == len(expected)
+    result &= all(m.get(key) == value for key, value in expected.items())
+    result &= not m.contains_key('1000')
+    print(result, m.get_size(), m.get_capacity())
@@ -6,6 +6,17 @@
 #              Don't modify the contents of this file.
 
 
+import pickle
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed by HashMap.from_arrays
+    np = None
+
+
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
 class DynamicArrayException(Exception):
@@ -78,6 +89,51 @@ class DynamicArray:
         return len(self._data)
 
 
+def as_list(items) -> list:
+    """Return the elements of a DynamicArray or any other iterable as a list."""
+    if isinstance(items, DynamicArray):
+        return items._data.copy()
+    return list(items)
+
+
+def dump_hashes(file, hashes) -> None:
+    """
+    Write a sequence of hashes to a binary file, as little-endian 64-bit
+    words if they all fit in one, or pickled otherwise.
+    """
+    try:
+        words = array('Q', hashes)
+    except OverflowError:
+        file.write(b'\x01')
+        pickle.dump(list(hashes), file, pickle.HIGHEST_PROTOCOL)
+        return
+
+    if sys.byteorder == 'big':
+        words.byteswap()
+    file.write(b'\x00')
+    file.write(struct.pack('<Q', len(words)))
+    file.write(words.tobytes())
+
+
+def load_hashes(file):
+    """Read back hashes written by dump_hashes, as an array or a list."""
+    encoding = file.read(1)
+    if encoding == b'\x01':
+        return pickle.load(file)
+    if encoding != b'\x00':
+        raise ValueError("unknown hash encoding")
+
+    (count,) = struct.unpack('<Q', file.read(8))
+    data = file.read(8 * count)
+    if len(data) != 8 * count:
+        raise ValueError("file ends in the middle of the hashes")
+    words = array('Q')
+    words.frombytes(data)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
     hash = 0
@@ -96,6 +152,227 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# Faster, better distributed hash functions; any of them can be given to
+# either HashMap in place of hash_function_1 or hash_function_2.
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+_MERSENNE_61 = (1 << 61) - 1
+_GOLDEN_64 = 0x9E3779B97F4A7C15
+
+
+def _hash_bytes(data: bytes, a: int, b: int) -> int:
+    """
+    Reads data (plus a terminating byte, so trailing zero bytes still count)
+    as one little-endian integer and reduces it modulo the Mersenne prime
+    2**61 - 1 in a single C-level pass instead of a Python loop per character.
+    The result is mapped through a * x + b and spread over 64 bits with a
+    multiplicative mix so the low bits are as well distributed as the high.
+    """
+    x = int.from_bytes(data + b'\x01', 'little') % _MERSENNE_61
+    x = (a * x + b) % _MERSENNE_61
+    x = (x * _GOLDEN_64) & _MASK_64
+    return x ^ (x >> 29)
+
+
+def _splitmix_64(seed: int) -> int:
+    """Scramble seed into a well mixed 64-bit integer"""
+    seed = (seed + _GOLDEN_64) & _MASK_64
+    seed = ((seed ^ (seed >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    seed = ((seed ^ (seed >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return seed ^ (seed >> 31)
+
+
+def hash_function_builtin(key: str) -> int:
+    """
+    Hash function wrapping Python's built-in hash().
+    Fastest of the family, but string hashes are randomized per process
+    (see PYTHONHASHSEED), so values can't be shared between processes.
+    """
+    return hash(key) & _MASK_64
+
+
+def hash_function_bytes(key: str) -> int:
+    """
+    Hash function over the whole UTF-8 encoded key at once.
+    Gives the same value in every process.
+    """
+    return _hash_bytes(key.encode('utf-8'), 1, 0)
+
+
+def seeded_hash_function(seed: int) -> callable:
+    """
+    Return a hash function like hash_function_bytes whose values also
+    depend on seed, so different seeds spread the same keys differently.
+    """
+    a = 1 + _splitmix_64(seed) % (_MERSENNE_61 - 1)
+    b = _splitmix_64(seed + 1) % _MERSENNE_61
+
+    def hash_function_seeded(key: str) -> int:
+        return _hash_bytes(key.encode('utf-8'), a, b)
+
+    return hash_function_seeded
+
+
+# Hash functions for integer and bytes keys. Each one has a NumPy version
+# attached as its "vectorized" attribute, which HashMap.from_arrays uses to
+# hash a whole array of keys at once; both give the same values.
+
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+
+
+def hash_function_int(key: int) -> int:
+    """Hash function for integer keys"""
+    return _splitmix_64(key)
+
+
+def hash_function_binary(key: bytes) -> int:
+    """
+    Hash function for bytes keys: FNV-1a over 8-byte words, then mixed.
+    Trailing zero bytes are ignored, just like NumPy's bytes arrays do.
+    """
+    key = key.rstrip(b'\x00')
+    hash = _FNV_OFFSET
+    for (word,) in struct.iter_unpack('<Q', key + bytes(-len(key) % 8)):
+        hash = ((hash ^ word) * _FNV_PRIME) & _MASK_64
+    return _splitmix_64(hash ^ len(key))
+
+
+def _splitmix_64_array(seeds):
+    """NumPy version of _splitmix_64 over a uint64 array"""
+    seeds = seeds + np.uint64(_GOLDEN_64)
+    seeds = (seeds ^ (seeds >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    seeds = (seeds ^ (seeds >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return seeds ^ (seeds >> np.uint64(31))
+
+
+def _hash_int_array(keys):
+    """NumPy version of hash_function_int over an integer array"""
+    with np.errstate(over='ignore'):
+        return _splitmix_64_array(keys.astype(np.uint64))
+
+
+def _hash_binary_array(keys):
+    """NumPy version of hash_function_binary over a fixed-width bytes array"""
+    count, width = len(keys), keys.dtype.itemsize
+    lengths = np.char.str_len(keys).astype(np.uint64)
+    word_counts = (lengths + np.uint64(7)) // np.uint64(8)
+
+    # zero-pad every key to a whole number of little-endian 8-byte words
+    padded = np.zeros((count, -(-width // 8) * 8), dtype=np.uint8)
+    padded[:, :width] = np.frombuffer(keys.tobytes(), dtype=np.uint8).reshape(count, width)
+    words = padded.view('<u8')
+
+    with np.errstate(over='ignore'):
+        hashes = np.full(count, _FNV_OFFSET, dtype=np.uint64)
+        for i in range(words.shape[1]):
+            # only fold in the words that are part of each key
+            folded = (hashes ^ words[:, i]) * np.uint64(_FNV_PRIME)
+            hashes = np.where(word_counts > i, folded, hashes)
+        return _splitmix_64_array(hashes ^ lengths)
+
+
+hash_function_int.vectorized = _hash_int_array
+hash_function_binary.vectorized = _hash_binary_array
+
+
+def mixed_hash_function(function: callable) -> callable:
+    """
+    Return a hash function giving the values of function run through the
+    SplitMix64 finalizer, so every bit of the result, the low ones
+    included, depends on every bit of the original hash. The HashMaps use
+    it in power of two mode, where a bucket is picked by the low bits alone.
+    If function has a "vectorized" version, so does the result.
+    """
+    def hash_function_mixed(key) -> int:
+        return _splitmix_64(function(key) & _MASK_64)
+
+    vectorized = getattr(function, 'vectorized', None)
+    if vectorized is not None:
+        def hash_mixed_array(keys):
+            with np.errstate(over='ignore'):
+                return _splitmix_64_array(vectorized(keys).astype(np.uint64))
+        hash_function_mixed.vectorized = hash_mixed_array
+
+    return hash_function_mixed
+
+
+def next_power_of_two(capacity: int) -> int:
+    """
+    Return the smallest power of two that is at least capacity (and at least 4)
+    """
+    return 1 << max(capacity - 1, 3).bit_length()
+
+
+# Prime capacities for every HashMap, shared by all instances. Both return
+# the same answers as HashMap._is_prime and HashMap._next_prime (for
+# capacities of at least 1), without trial division.
+
+# with these bases, Miller-Rabin is exact for every n below 3.3 * 10 ** 24
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(n: int) -> bool:
+    """
+    Determine if n is a prime number with the Miller-Rabin test
+    """
+    if n < 2:
+        return False
+    for prime in _MILLER_RABIN_BASES:
+        if n % prime == 0:
+            return n == prime
+
+    # n - 1 = d * 2 ** s with d odd
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for base in _MILLER_RABIN_BASES:
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+# Growth ladder: maps each capacity a table asks for while doubling from
+# the default capacity of 11 (11, then 2 * 11, then twice the prime that
+# gave, ...) to the prime it gets, so those lookups take no search at all
+_PRIME_LADDER = {}
+
+
+def next_prime(capacity: int) -> int:
+    """
+    Return the smallest odd prime that is at least capacity
+    """
+    prime = _PRIME_LADDER.get(capacity)
+    if prime is not None:
+        return prime
+
+    if capacity % 2 == 0:
+        capacity += 1
+    while not is_prime(capacity):
+        capacity += 2
+    return capacity
+
+
+def _build_prime_ladder(start: int, limit: int) -> None:
+    """Fill _PRIME_LADDER with the doubling steps from start up to limit"""
+    prime = next_prime(start)
+    while prime < limit:
+        _PRIME_LADDER[prime] = prime
+        _PRIME_LADDER[2 * prime] = prime = next_prime(2 * prime)
+
+
+_build_prime_ladder(11, 1 << 40)
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +380,15 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    # no per-node __dict__, since a map holds one node per entry
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """Initialize node given a key, value and optionally the key's hash."""
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -141,9 +422,12 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, remove, remove_node, contains, length, iterator
     """
 
+    # a map holds one list per bucket
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -168,20 +452,28 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node at front of the list, caching the key's hash if given."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node in at the front of the list."""
+        node.next = self._head
+        self._head = node
+        self._size += 1
+
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If hash is given, nodes whose cached hash differs are skipped
+        without comparing keys, so it must have been given on insert too.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -192,11 +484,41 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def remove_node(self, key: str, hash: int = None) -> SLNode:
+        """
+        Remove first node with matching key, the same way remove does.
+        Return the unlinked node, or None if no match.
+        """
+        previous, node = None, self._head
+        while node:
+
+            if (hash is None or node.hash == hash) and node.key == key:
+                if previous:
+                    previous.next = node.next
+                else:
+                    self._head = node.next
+                self._size -= 1
+                return node
+
+            previous, node = node, node.next
+        return None
+
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash is given, nodes whose cached hash differs are skipped
+        without comparing keys, so it must have been given on insert too.
+        """
         node = self._head
+        if hash is None:
+            while node:
+                if node.key == key:
+                    return node
+                node = node.next
+            return node
+
         while node:
-            if node.key == key:
+            if node.hash == hash and node.key == key:
                 return node
             node = node.next
         return node
@@ -210,10 +532,14 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    # no per-entry __dict__, since a map holds one entry per key
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """Initialize an entry for use in a hash map, caching the key's hash if given."""
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False